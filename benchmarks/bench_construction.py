@@ -0,0 +1,46 @@
+"""Compares the cost of building a MicroDataFrame with building a plain
+DataFrame and a Series of its weights, and fails if it is more than
+MAX_RATIO times slower.
+
+Run with ``python benchmarks/bench_construction.py``.
+"""
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import microdf as mdf
+
+
+N_ROWS = 1_000
+N_COLUMNS = 20
+N_REPEATS = 1_000
+MAX_RATIO = 2
+
+
+def main():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(size=(N_ROWS, N_COLUMNS)))
+    weights = rng.uniform(size=N_ROWS)
+    plain = timeit.timeit(
+        lambda: (pd.DataFrame(data), pd.Series(weights)), number=N_REPEATS
+    )
+    micro = timeit.timeit(
+        lambda: mdf.MicroDataFrame(data, weights=weights), number=N_REPEATS
+    )
+    ratio = micro / plain
+    print(
+        f"construction: {micro / N_REPEATS * 1e6:.1f}us MicroDataFrame, "
+        f"{plain / N_REPEATS * 1e6:.1f}us DataFrame and weights "
+        f"({ratio:.1f}x)"
+    )
+    d = mdf.MicroDataFrame(data, weights=weights)
+    sliced = timeit.timeit(lambda: d[d[0] > 0], number=N_REPEATS)
+    print(f"boolean slice: {sliced / N_REPEATS * 1e6:.1f}us")
+    if ratio > MAX_RATIO:
+        sys.exit(f"MicroDataFrame construction is over {MAX_RATIO}x slower.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compares the cost of MicroSeries attribute access with the previous
+__getattr__, which wrapped every result in a new MicroSeries.
+
+Run with ``python benchmarks/bench_getattr.py``.
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import microdf as mdf
+
+
+N_ROWS = 1_000
+N_ACCESSES = 10_000
+
+
+def previous_getattr(s, name):
+    """The previous path: wrap whatever pandas returns."""
+    return mdf.MicroSeries(pd.Series.__getattr__(s, name), weights=s.weights)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    index = [f"row_{i}" for i in range(N_ROWS)]
+    s = mdf.MicroSeries(
+        rng.normal(size=N_ROWS), index=index, weights=rng.uniform(size=N_ROWS)
+    )
+    now = timeit.timeit(lambda: s.row_10, number=N_ACCESSES)
+    before = timeit.timeit(
+        lambda: previous_getattr(s, "row_10"), number=N_ACCESSES
+    )
+    print(
+        f"label attribute: {now / N_ACCESSES * 1e6:.2f}us now, "
+        f"{before / N_ACCESSES * 1e6:.2f}us previously ({before / now:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Compares grouped weighted aggregations with the per-group paths they
+replace.
+
+Run with ``python benchmarks/bench_groupby.py``.
+"""
+import timeit
+
+import numpy as np
+import pandas as pd
+
+import microdf as mdf
+
+
+N_ROWS = 1_000_000
+N_GROUPS = 3_000
+
+
+def per_group(s, keys, name):
+    """The previous path: one MicroSeries per group."""
+    df = pd.DataFrame(
+        dict(
+            a=pd.Series(s.values).groupby(keys).apply(np.array),
+            w=pd.Series(s.weights.values).groupby(keys).apply(np.array),
+        )
+    )
+    return df.agg(
+        lambda row: getattr(mdf.MicroSeries(row.a, weights=row.w), name)(),
+        axis=1,
+    )
+
+
+def main():
+    rng = np.random.default_rng(0)
+    s = mdf.MicroSeries(
+        rng.lognormal(10, 1, N_ROWS), weights=rng.uniform(1, 100, N_ROWS)
+    )
+    keys = rng.integers(0, N_GROUPS, N_ROWS)
+    for name in ["sum", "count", "mean", "median"]:
+        gb = s.groupby(keys)
+        vectorised = timeit.timeit(lambda: getattr(gb, name)(), number=3) / 3
+        previous = timeit.timeit(lambda: per_group(s, keys, name), number=1)
+        print(
+            f"{name}: {vectorised:.4f}s vectorised, {previous:.4f}s per "
+            f"group ({previous / vectorised:.0f}x)"
+        )
+    gb = s.groupby(keys)
+    print(f"rank: {timeit.timeit(gb.rank, number=1):.4f}s vectorised")
+    df = pd.DataFrame(dict(x=s.values, w=s.weights.values, g=keys))
+    vectorised = timeit.timeit(
+        lambda: mdf.gini(df, "x", "w", groupby="g"), number=1
+    )
+    previous = timeit.timeit(
+        lambda: df.groupby("g").apply(lambda x: mdf.gini(x, "x", "w")),
+        number=1,
+    )
+    print(
+        f"gini: {vectorised:.4f}s vectorised, {previous:.4f}s per group "
+        f"({previous / vectorised:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
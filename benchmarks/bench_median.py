@@ -0,0 +1,29 @@
+"""Compares the weighted median by selection with the full sort.
+
+Run with ``python benchmarks/bench_median.py``.
+"""
+import timeit
+
+import numpy as np
+
+import microdf as mdf
+
+
+N_ROWS = 10_000_000
+
+
+def main():
+    rng = np.random.default_rng(0)
+    income = rng.lognormal(10, 1, N_ROWS)
+    weights = rng.uniform(1, 100, N_ROWS)
+    series = mdf.MicroSeries(income, weights=weights)
+    selected = timeit.timeit(series.median, number=1)
+    sort = timeit.timeit(lambda: series.ecdf().quantile(0.5), number=1)
+    print(
+        f"median of {N_ROWS:,} rows: {selected:.2f}s by selection, "
+        f"{sort:.2f}s by sorting ({sort / selected:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
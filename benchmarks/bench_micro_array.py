@@ -0,0 +1,44 @@
+"""Compares a simulation-style inner loop on MicroSeries and MicroArray.
+
+Run with ``python benchmarks/bench_micro_array.py``.
+"""
+import timeit
+
+import numpy as np
+
+import microdf as mdf
+
+
+N_ROWS = 10_000
+N_REPEATS = 200
+
+
+def aggregate(income, tax_rate):
+    net = income - income * tax_rate
+    return net.mean(), (net > 20_000).sum()
+
+
+def inequality(income, tax_rate):
+    return (income - income * tax_rate).gini()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    income = rng.lognormal(10, 1, N_ROWS)
+    weights = rng.uniform(1, 100, N_ROWS)
+    series = mdf.MicroSeries(income, weights=weights)
+    array = mdf.MicroArray(income, weights=weights)
+    for step in [aggregate, inequality]:
+        times = [
+            timeit.timeit(lambda: step(x, 0.2), number=N_REPEATS) / N_REPEATS
+            for x in [series, array]
+        ]
+        print(
+            f"{step.__name__}: {times[0] * 1e3:.3f}ms MicroSeries, "
+            f"{times[1] * 1e3:.3f}ms MicroArray "
+            f"({times[0] / times[1]:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
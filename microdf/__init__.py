@@ -25,6 +25,7 @@ from .custom_taxes import (
     add_ftt,
     add_vat,
 )
+from .group_index import GroupIndex
 from .income_measures import cash_income, market_income, tpc_eci
 from .inequality import (
     bottom_50_pct_share,
@@ -37,7 +38,7 @@ from .inequality import (
     top_50_pct_share,
     top_x_pct_share,
 )
-from .io import read_stata_zip
+from .io import read_chunks, read_feather, read_parquet, read_stata_zip
 from .poverty import (
     fpl,
     poverty_rate,
@@ -72,7 +73,11 @@ from .weighted import (
     weighted_quantile,
     weighted_sum,
 )
-from .generic import MicroDataFrame, MicroSeries
+from .generic import MicroDataFrame, MicroSeries, WeightedECDF
+from .micro_array import MicroArray
+from .sketch import WeightedQuantileSketch
+from .summary import WeightedSummary
+from .chunked import ChunkedMicroSeries, stream_agg
 
 name = "microdf"
 __version__ = "0.1.0"
@@ -110,6 +115,8 @@ __all__ = [
     "add_vat",
     "add_carbon_tax",
     "add_ftt",
+    # group_index.py
+    "GroupIndex",
     # income_measures.py
     "cash_income",
     "tpc_eci",
@@ -125,6 +132,9 @@ __all__ = [
     "top_50_pct_share",
     "t10_b50",
     # io.py
+    "read_chunks",
+    "read_feather",
+    "read_parquet",
     "read_stata_zip",
     # poverty.py
     "fpl",
@@ -167,4 +177,14 @@ __all__ = [
     # generic.py
     "MicroSeries",
     "MicroDataFrame",
+    "WeightedECDF",
+    # micro_array.py
+    "MicroArray",
+    # sketch.py
+    "WeightedQuantileSketch",
+    # summary.py
+    "WeightedSummary",
+    # chunked.py
+    "ChunkedMicroSeries",
+    "stream_agg",
 ]
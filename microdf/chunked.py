@@ -0,0 +1,452 @@
+from typing import Callable, Iterable, Iterator, Union
+import numpy as np
+import pandas as pd
+
+from microdf.generic import MicroDataFrame, MicroSeries
+from microdf.selection import _interpolate
+from microdf.sketch import WeightedQuantileSketch
+from microdf.summary import WeightedSummary
+from microdf.utils import listify
+
+
+class ChunkedMicroSeries:
+    def __init__(
+        self, chunks: Union[Iterable[MicroSeries], Callable[[], Iterable]]
+    ):
+        """A MicroSeries evaluated chunk by chunk, for data too large to
+        hold in memory, such as a column streamed from disk. Only one chunk
+        is held at a time.
+
+        :param chunks: Iterable of MicroSeries, or a function returning
+            one. Statistics that need more than one pass over the data
+            need a function, or a container that can be iterated again.
+        :type chunks: Union[Iterable[MicroSeries], Callable[[], Iterable]]
+        """
+        self._chunks = chunks
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Union[Iterable[pd.DataFrame], Callable[[], Iterable]],
+        col: str,
+        w: str = None,
+    ) -> "ChunkedMicroSeries":
+        """Makes a ChunkedMicroSeries of a column of DataFrame chunks, such
+        as those of pd.read_csv(chunksize=...) or parquet row groups.
+
+        :param frames: Iterable of DataFrames, or a function returning one.
+        :type frames: Union[Iterable[pd.DataFrame], Callable[[], Iterable]]
+        :param col: Name of the column.
+        :type col: str
+        :param w: Name of the weight column, defaults to equal weights.
+        :type w: str
+        :returns: Chunked column.
+        :rtype: ChunkedMicroSeries
+        """
+
+        def chunks():
+            for frame in _iterate(frames):
+                weights = None if w is None else frame[w].values
+                yield MicroSeries(frame[col].values, weights=weights)
+
+        return cls(chunks)
+
+    def chunks(self) -> Iterator[MicroSeries]:
+        """Iterates over the chunks, calling the function given for them
+        if any.
+
+        :returns: Iterator of MicroSeries.
+        :rtype: Iterator[MicroSeries]
+        """
+        return _iterate(self._chunks)
+
+    def _arrays(self) -> Iterator[tuple]:
+        """Iterates over the values and weights of each chunk, as float
+        arrays without missing values.
+        """
+        for chunk in self.chunks():
+            values = np.asarray(chunk.values, dtype=float)
+            weights = np.asarray(chunk.weights.values, dtype=float)
+            valid = ~np.isnan(values)
+            yield values[valid], weights[valid]
+
+    def sketch(self, compression: float = 1000) -> WeightedQuantileSketch:
+        """Summarises all the chunks in one pass, in a quantile sketch.
+
+        :param compression: Size of the sketch, as in
+            WeightedQuantileSketch, defaults to 1000.
+        :type compression: float
+        :returns: Sketch of the values and weights.
+        :rtype: WeightedQuantileSketch
+        """
+        sketch = WeightedQuantileSketch(compression)
+        for chunk in self.chunks():
+            sketch.update(chunk.values, chunk.weights.values)
+        return sketch
+
+    def summary(self, bins: np.array = None) -> WeightedSummary:
+        """Summarises all the chunks in one pass.
+
+        :param bins: Array of histogram bin edges, defaults to no
+            histogram.
+        :type bins: np.array
+        :returns: Summary of the values and weights.
+        :rtype: WeightedSummary
+        """
+        summary = WeightedSummary(bins)
+        for chunk in self.chunks():
+            summary.update(chunk.values, chunk.weights.values)
+        return summary
+
+    def sum(self) -> float:
+        """Calculates the weighted sum, skipping missing values.
+
+        :returns: The weighted sum.
+        :rtype: float
+        """
+        return self.summary().sum
+
+    def count(self) -> float:
+        """Calculates the weighted count of values that aren't missing.
+
+        :returns: The weighted count.
+        :rtype: float
+        """
+        return self.summary().count
+
+    def mean(self) -> float:
+        """Calculates the weighted mean, skipping missing values.
+
+        :returns: The weighted mean.
+        :rtype: float
+        """
+        return self.summary().mean
+
+    def quantile(
+        self, q: np.array, exact: bool = False, compression: float = 1000
+    ) -> Union[float, pd.Series]:
+        """Calculates weighted quantiles. By default they're estimated from
+        a sketch in one pass, with the error bounds of
+        WeightedQuantileSketch. Exact quantiles equal weighted_quantile of
+        all the chunks together, but take several passes, so need chunks
+        that can be iterated again. Top share thresholds are quantiles too:
+        the top 10% starts at quantile 0.9. Missing values are skipped.
+
+        :param q: Quantile or array of quantiles to calculate.
+        :type q: np.array
+        :param exact: Whether to calculate exact quantiles, as in
+            exact_quantiles, defaults to False.
+        :type exact: bool
+        :param compression: Size of the sketch, defaults to 1000.
+        :type compression: float
+        :returns: Weighted quantile, or Series of weighted quantiles.
+        :rtype: Union[float, pd.Series]
+        """
+        quantiles = np.array(q)
+        if exact:
+            result = self.exact_quantiles(quantiles)
+        else:
+            result = self.sketch(compression).quantile(quantiles)
+        if quantiles.shape == ():
+            return result
+        return pd.Series(result, index=quantiles)
+
+    def median(self) -> float:
+        """Estimates the weighted median.
+
+        :returns: The weighted median.
+        :rtype: float
+        """
+        return self.quantile(0.5)
+
+    def deciles(self) -> pd.Series:
+        """Estimates the weighted decile thresholds.
+
+        :returns: Series of the 10th to 90th weighted percentiles.
+        :rtype: pd.Series
+        """
+        return self.quantile(np.arange(1, 10) / 10)
+
+    def exact_quantiles(
+        self,
+        quantiles: np.array,
+        n_bins: int = 4096,
+        max_records: int = 1_000_000,
+    ) -> np.array:
+        """Calculates exact weighted quantiles by histogram refinement.
+        A first pass finds the total weight and range of the values, and
+        each further pass builds a weighted histogram of the values still
+        in contention for each quantile, keeping only the bin it falls in.
+        Once a bin holds at most max_records records, a last pass collects
+        them and the values just outside the bin, and the quantile is
+        interpolated as weighted_quantile does. Results equal
+        weighted_quantile of the concatenated data for integer weights, and
+        otherwise differ only by rounding in the cumulative weights.
+
+        :param quantiles: Quantile or array of quantiles to calculate.
+        :type quantiles: np.array
+        :param n_bins: Number of histogram bins per pass, defaults to 4096.
+        :type n_bins: int
+        :param max_records: Most records held in memory per quantile,
+            defaults to one million.
+        :type max_records: int
+        :returns: Weighted quantile, or array of weighted quantiles.
+        :rtype: np.array
+        """
+        if not callable(self._chunks) and iter(self._chunks) is self._chunks:
+            raise ValueError(
+                "Exact quantiles take several passes over the chunks. "
+                "Pass a function returning a new iterator of them."
+            )
+        quantiles = np.array(quantiles, dtype=float)
+        assert np.all(quantiles >= 0) and np.all(
+            quantiles <= 1
+        ), "quantiles should be in [0, 1]"
+        n, total, low, high = 0, 0.0, np.inf, -np.inf
+        for values, weights in self._arrays():
+            n += len(values)
+            total += np.sum(weights)
+            if len(values):
+                low = min(low, values.min())
+                high = max(high, values.max())
+        if n == 0:
+            raise ValueError("No values to calculate quantiles of.")
+        ranges = [_ValueRange(low, high, q, total) for q in quantiles.ravel()]
+        while True:
+            refining = [r for r in ranges if not r.done(max_records)]
+            if not refining:
+                break
+            for r in refining:
+                r.start_pass(n_bins)
+            self._check_pass(n, refining, "add")
+            for r in refining:
+                r.refine()
+        for r in ranges:
+            r.start_collection()
+        self._check_pass(n, ranges, "collect")
+        result = [r.interpolate(total) for r in ranges]
+        return np.array(result).reshape(quantiles.shape)
+
+    def _check_pass(self, n: int, ranges: list, method: str) -> None:
+        """Passes each chunk to a method of each value range, checking the
+        chunks haven't changed since the first pass.
+        """
+        count = 0
+        for values, weights in self._arrays():
+            count += len(values)
+            for r in ranges:
+                getattr(r, method)(values, weights)
+        if count != n:
+            raise ValueError(
+                "The chunks changed between passes. Pass a function "
+                "returning a new iterator of them."
+            )
+
+
+def stream_agg(
+    chunks: Iterable[MicroDataFrame],
+    sums: list = None,
+    means: list = None,
+    poverty_rates: dict = None,
+    groupby: Union[str, list] = None,
+) -> Union[pd.Series, pd.DataFrame]:
+    """Calculates weighted aggregates over a stream of MicroDataFrame
+    chunks, such as those of read_chunks, in one pass. Only per-group
+    totals are kept between chunks, so memory doesn't grow with the data.
+
+    :param chunks: Iterable of MicroDataFrames.
+    :type chunks: Iterable[MicroDataFrame]
+    :param sums: Columns to calculate weighted sums of, skipping missing
+        values, as MicroSeries.sum does.
+    :type sums: list
+    :param means: Columns to calculate weighted means of, skipping missing
+        values.
+    :type means: list
+    :param poverty_rates: Dict from names to (income, threshold) column
+        pairs, for the weighted share with income below threshold, as in
+        poverty_rate.
+    :type poverty_rates: dict
+    :param groupby: Column or list of columns to group by, defaults to
+        none.
+    :type groupby: Union[str, list]
+    :returns: Series of the aggregates, with a "weight" total and entries
+        named col_sum, col_mean and by the poverty rate names, or a
+        DataFrame of them with a row for each group.
+    :rtype: Union[pd.Series, pd.DataFrame]
+    """
+    sums, means = sums or [], means or []
+    poverty_rates = poverty_rates or {}
+    groupby = None if groupby is None else listify(groupby, dedup=False)
+    totals = None
+    for chunk in chunks:
+        weights = np.ones(len(chunk))
+        if chunk.weights is not None:
+            weights = np.asarray(chunk.weights, dtype=float)
+        parts = {("weight", ""): weights}
+        for col in dict.fromkeys(sums + means):
+            values = np.asarray(chunk[col], dtype=float)
+            missing = np.isnan(values)
+            parts[("sum", col)] = np.where(missing, 0, values * weights)
+            parts[("count", col)] = np.where(missing, 0, weights)
+        for name, (income, threshold) in poverty_rates.items():
+            poor = np.asarray(chunk[income] < chunk[threshold])
+            parts[("poor", name)] = poor * weights
+        partial = pd.DataFrame(parts, index=chunk.index)
+        if groupby is None:
+            partial = partial.sum()
+        else:
+            keys = [np.asarray(chunk[col]) for col in groupby]
+            partial = partial.groupby(keys).sum()
+        if totals is None:
+            totals = partial
+        else:
+            totals = totals.add(partial, fill_value=0)
+    if totals is None:
+        raise ValueError("No chunks to aggregate.")
+    if groupby is None:
+        totals = totals.to_frame().T
+    result = pd.DataFrame({"weight": totals[("weight", "")]})
+    for col in sums:
+        result[f"{col}_sum"] = totals[("sum", col)]
+    for col in means:
+        result[f"{col}_mean"] = totals[("sum", col)] / totals[("count", col)]
+    for name in poverty_rates:
+        result[name] = totals[("poor", name)] / totals[("weight", "")]
+    if groupby is None:
+        return result.iloc[0].rename(None)
+    result.index.names = groupby
+    return result
+
+
+def _iterate(chunks: Union[Iterable, Callable[[], Iterable]]) -> Iterator:
+    if callable(chunks):
+        return iter(chunks())
+    return iter(chunks)
+
+
+class _ValueRange:
+    def __init__(self, low: float, high: float, q: float, total: float):
+        """Range of values, from low up to high, containing quantile q,
+        narrowed pass by pass.
+        """
+        self.low, self.high = low, high
+        # Whether high itself is in the range. Only the top of the range of
+        # all values is.
+        self.closed = True
+        self.q = q
+        self.target = q * total
+        self.count = np.inf
+        # Set when the bins can't split the range any further.
+        self.exhausted = False
+
+    def done(self, max_records: int) -> bool:
+        return self.count <= max_records or self.tied or self.exhausted
+
+    @property
+    def tied(self) -> bool:
+        return self.low == self.high
+
+    def _contains(self, values: np.array) -> np.array:
+        if self.closed:
+            return (values >= self.low) & (values <= self.high)
+        return (values >= self.low) & (values < self.high)
+
+    def start_pass(self, n_bins: int) -> None:
+        self.edges = np.linspace(self.low, self.high, n_bins + 1)
+        self.below = 0.0
+        self.bin_weights = np.zeros(n_bins)
+        self.bin_counts = np.zeros(n_bins, dtype=int)
+
+    def add(self, values: np.array, weights: np.array) -> None:
+        self.below += np.sum(weights[values < self.low])
+        contained = self._contains(values)
+        n_bins = len(self.bin_counts)
+        bins = np.searchsorted(self.edges, values[contained], "right") - 1
+        # The top edge belongs to the last bin.
+        bins = np.minimum(bins, n_bins - 1)
+        self.bin_weights += np.bincount(
+            bins, weights[contained], minlength=n_bins
+        )
+        self.bin_counts += np.bincount(bins, minlength=n_bins)
+
+    def refine(self) -> None:
+        """Narrows the range to the bin whose cumulative weights reach the
+        target.
+        """
+        cumulative = self.below + np.cumsum(self.bin_weights)
+        b = np.searchsorted(cumulative, self.target, "right")
+        # Rounding can put the target just outside the range, whose end
+        # bins may be empty.
+        occupied = np.flatnonzero(self.bin_counts)
+        b = np.clip(b, occupied[0], occupied[-1])
+        low, high = self.edges[b], self.edges[b + 1]
+        closed = self.closed and b == len(self.bin_counts) - 1
+        count = self.bin_counts[b]
+        self.exhausted = (low, high, closed, count) == (
+            self.low,
+            self.high,
+            self.closed,
+            self.count,
+        )
+        self.low, self.high, self.closed, self.count = low, high, closed, count
+
+    def start_collection(self) -> None:
+        self.below = 0.0
+        self.values, self.weights = [], []
+        # Weights of the first and last of tied values, and their total.
+        self.tied_weights = [None, None, 0.0]
+        # (value, weight) of the last value before the range, and of the
+        # first value after it.
+        self.lower = self.upper = None
+
+    def collect(self, values: np.array, weights: np.array) -> None:
+        is_below = values < self.low
+        contained = self._contains(values)
+        is_above = ~(is_below | contained)
+        self.below += np.sum(weights[is_below])
+        if self.tied:
+            # Only the ends of a run of tied values matter, so a long run
+            # isn't held in memory.
+            if contained.any():
+                tied_weights = weights[contained]
+                if self.tied_weights[0] is None:
+                    self.tied_weights[0] = tied_weights[0]
+                self.tied_weights[1] = tied_weights[-1]
+                self.tied_weights[2] += np.sum(tied_weights)
+        else:
+            self.values.append(values[contained])
+            self.weights.append(weights[contained])
+        if is_below.any():
+            below_values = values[is_below]
+            # The last of tied values sorts last.
+            i = len(below_values) - 1 - np.argmax(below_values[::-1])
+            if self.lower is None or below_values[i] >= self.lower[0]:
+                self.lower = (below_values[i], weights[is_below][i])
+        if is_above.any():
+            above_values = values[is_above]
+            i = np.argmin(above_values)
+            if self.upper is None or above_values[i] < self.upper[0]:
+                self.upper = (above_values[i], weights[is_above][i])
+
+    def interpolate(self, total: float) -> float:
+        if not self.tied:
+            return _interpolate(
+                np.concatenate(self.values),
+                np.concatenate(self.weights),
+                total,
+                self.q,
+                self.below,
+                self.lower,
+                self.upper,
+            )
+        first, last, tied_total = self.tied_weights
+        values = [self.low, self.low]
+        end = self.below + tied_total
+        positions = [self.below + first - 0.5 * first, end - 0.5 * last]
+        if self.lower is not None:
+            values.insert(0, self.lower[0])
+            positions.insert(0, self.below - 0.5 * self.lower[1])
+        if self.upper is not None:
+            values.append(self.upper[0])
+            positions.append(end + 0.5 * self.upper[1])
+        return np.interp(self.q, np.array(positions) / total, values)
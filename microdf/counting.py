@@ -0,0 +1,135 @@
+import numpy as np
+
+# Ranges of integers up to which values are counted rather than sorted.
+MAX_COUNTED_RANGE = 2 ** 16
+# Ranges up to which values are counted when asked to. Counting allocates
+# about 32 bytes per possible value, 128 MB at this limit.
+MAX_FORCED_COUNTED_RANGE = 2 ** 22
+
+
+def small_range_codes(values: np.array, small_range: bool = None) -> tuple:
+    """Checks whether values are integers in a small range, such as ages or
+    numbers of children, whose weighted statistics can be counted rather
+    than sorted.
+
+    :param values: Array of values.
+    :type values: np.array
+    :param small_range: Whether to count the values. None counts integers
+        whose range is under MAX_COUNTED_RANGE, True counts integers whose
+        range is under MAX_FORCED_COUNTED_RANGE, which can be faster than
+        sorting for large arrays at the cost of about 32 bytes of memory per
+        possible value, and False never counts.
+    :type small_range: bool
+    :returns: Tuple of the values less their minimum, as unsigned integer
+        codes, and the minimum, or None if the values can't be counted.
+    :rtype: tuple
+    """
+    values = np.asarray(values)
+    if small_range is False or len(values) == 0:
+        return None
+    if values.dtype.kind == "b":
+        values = values.view(np.uint8)
+    if values.dtype.kind not in "iuf":
+        return None
+    low, high = values.min(), values.max()
+    # Missing values make the range NaN, so aren't counted.
+    limit = MAX_FORCED_COUNTED_RANGE if small_range else MAX_COUNTED_RANGE
+    if not float(high) - float(low) < limit:
+        return None
+    if values.dtype.kind == "f" and not np.array_equal(
+        values, np.round(values)
+    ):
+        return None
+    dtype = np.uint16 if float(high) - float(low) < 2 ** 16 else np.uint32
+    # A stable sort of 16-bit codes is a linear-time radix sort.
+    return (values - low).astype(dtype), low
+
+
+def _value_weights(codes: np.array, weights: np.array) -> tuple:
+    """Returns the codes present, in order, and their total weight."""
+    present = np.flatnonzero(np.bincount(codes))
+    return present, np.bincount(codes, weights=weights)[present]
+
+
+def counted_quantiles(
+    codes: np.array,
+    low: float,
+    weights: np.array,
+    total: float,
+    quantiles: np.array,
+) -> np.array:
+    """Calculates weighted quantiles as MicroSeries.quantile does, from the
+    weight of each distinct value in O(n + k) time for k possible values.
+
+    :param codes: Values less their minimum, from small_range_codes.
+    :type codes: np.array
+    :param low: Minimum value.
+    :type low: float
+    :param weights: Array of weights.
+    :type weights: np.array
+    :param total: Sum of the weights.
+    :type total: float
+    :param quantiles: Quantile or array of quantiles to calculate.
+    :type quantiles: np.array
+    :returns: Weighted quantile, or array of weighted quantiles, missing if
+        the weights sum to zero.
+    :rtype: np.array
+    """
+    if total == 0:
+        return np.asarray(quantiles) * np.nan
+    present, value_weights = _value_weights(codes, weights)
+    # Interpolation between tied values gives the value itself, so only
+    # the first and last of each value matter. Scattering keeps the last
+    # index written for each code.
+    n = len(codes)
+    first = np.empty(present[-1] + 1, dtype=np.intp)
+    first[codes[::-1]] = np.arange(n - 1, -1, -1)
+    last = np.empty(present[-1] + 1, dtype=np.intp)
+    last[codes] = np.arange(n)
+    first_weights = weights[first[present]]
+    last_weights = weights[last[present]]
+    ends = np.cumsum(value_weights)
+    starts = ends - value_weights
+    positions = np.column_stack(
+        [
+            starts + first_weights - 0.5 * first_weights,
+            ends - 0.5 * last_weights,
+        ]
+    ).ravel()
+    values = np.repeat(present + low, 2)
+    return np.interp(quantiles, positions / total, values)
+
+
+def counted_gini(
+    codes: np.array, low: float, weights: np.array, negatives: str = None
+) -> float:
+    """Calculates the Gini index as MicroSeries.gini does, from the weight
+    of each distinct value in O(n + k) time for k possible values.
+
+    :param codes: Values less their minimum, from small_range_codes.
+    :type codes: np.array
+    :param low: Minimum value.
+    :type low: float
+    :param weights: Array of weights.
+    :type weights: np.array
+    :param negatives: How to treat negative values, as in MicroSeries.gini.
+    :type negatives: str
+    :returns: Gini index.
+    :rtype: float
+    """
+    present, value_weights = _value_weights(codes, weights)
+    values = (present + low).astype(float)
+    if negatives == "zero" and values[0] < 0:
+        values = np.maximum(values, 0)
+    if negatives == "shift" and values[0] < 0:
+        values = values - values[0]
+    cumulative_weights = np.cumsum(value_weights)
+    cumulative_weighted_values = np.cumsum(values * value_weights)
+    # Each record adds its weight times the gap between its value and
+    # every record sorted before it, which is the same for tied values.
+    gaps = values * (cumulative_weights - value_weights) - (
+        cumulative_weighted_values - values * value_weights
+    )
+    return np.sum(value_weights * gaps) / (
+        cumulative_weighted_values[-1] * cumulative_weights[-1]
+    )
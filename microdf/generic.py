@@ -1,12 +1,503 @@
 from typing import Callable, Union
-from functools import wraps
-import warnings
-import copy
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, wraps
+from inspect import signature
+import json
+import weakref
 import numpy as np
 import pandas as pd
 
+from microdf._optional import import_optional_dependency
+from microdf.counting import counted_gini, counted_quantiles, small_range_codes
+from microdf.group_index import GroupIndex, interpolate_quantiles
+from microdf.selection import MAX_SELECTED_QUANTILES, select_quantiles
+from microdf.sketch import WeightedQuantileSketch
+from microdf.summary import WeightedSummary
+
+
+# Schema metadata key of the weights of MicroDataFrames written to Arrow
+# files, and the column holding weights that weren't a column.
+WEIGHTS_METADATA_KEY = b"microdf"
+WEIGHTS_COLUMN = "__weights__"
+
+
+class WeightedECDF:
+    def __init__(
+        self,
+        values: np.ndarray,
+        weights: np.ndarray,
+        small_range: bool = None,
+    ):
+        """Weighted empirical distribution of a set of values: their sort
+        order, cumulative weights and cumulative weighted values. Quantiles,
+        percentile ranks of new values and shares between percentiles are
+        then answered by binary search. Each array is computed on first use
+        and kept.
+
+        Integers in a small range, such as ages, are counted instead:
+        quantiles and the Gini index come from the weight of each distinct
+        value, and the sort order from a linear-time radix sort.
+
+        :param values: Array of values.
+        :type values: np.ndarray
+        :param weights: Array of weights.
+        :type weights: np.ndarray
+        :param small_range: Whether to count the values, as in
+            microdf.counting.small_range_codes. Defaults to None, which
+            counts integers with a range under MAX_COUNTED_RANGE.
+        :type small_range: bool
+        """
+        self._values = values
+        self._weights = weights
+        self._small_range = small_range
+
+    @cached_property
+    def _codes(self) -> tuple:
+        return small_range_codes(self._values, self._small_range)
+
+    @cached_property
+    def order(self) -> np.ndarray:
+        # A stable sort keeps tied values in their original order, so ranks
+        # and quantiles of tied values are deterministic. Codes sort in the
+        # same order as the values they stand for.
+        if self._codes is not None:
+            return np.argsort(self._codes[0], kind="stable")
+        return np.argsort(self._values, kind="stable")
+
+    @cached_property
+    def inverse_order(self) -> np.ndarray:
+        # Scattering positions inverts the permutation in linear time.
+        inverse_order = np.empty(len(self.order), dtype=np.intp)
+        inverse_order[self.order] = np.arange(len(self.order))
+        return inverse_order
+
+    @cached_property
+    def values(self) -> np.ndarray:
+        return self._values[self.order]
+
+    @cached_property
+    def weights(self) -> np.ndarray:
+        return self._weights[self.order]
+
+    @cached_property
+    def total_weight(self) -> float:
+        return np.sum(self._weights)
+
+    @cached_property
+    def cumulative_weights(self) -> np.ndarray:
+        return np.cumsum(self.weights)
+
+    @cached_property
+    def cumulative_weighted_values(self) -> np.ndarray:
+        # Missing values are sorted last and count as zero, as in sum().
+        return np.nancumsum(self.values * self.weights)
+
+    @cached_property
+    def quantile_positions(self) -> np.ndarray:
+        """Normalised cumulative weight at the midpoint of each value, used
+        to interpolate weighted quantiles.
+        """
+        positions = self.cumulative_weights - 0.5 * self.weights
+        return positions / self.total_weight
+
+    def quantile(self, quantiles: np.ndarray) -> np.ndarray:
+        """Calculates weighted quantiles, as MicroSeries.quantile does.
+
+        :param quantiles: Quantile or array of quantiles to calculate.
+        :type quantiles: np.ndarray
+        :returns: Weighted quantile, or array of weighted quantiles.
+        :rtype: np.ndarray
+        """
+        if self._codes is not None:
+            return counted_quantiles(
+                *self._codes, self._weights, self.total_weight, quantiles
+            )
+        return np.interp(quantiles, self.quantile_positions, self.values)
+
+    def cdf(self, x: np.ndarray) -> np.ndarray:
+        """Calculates the share of the total weight at or below each of a
+        set of values, which needn't be in the distribution.
+
+        :param x: Value or array of values.
+        :type x: np.ndarray
+        :returns: Share of weight at or below each value.
+        :rtype: np.ndarray
+        """
+        below = np.searchsorted(self.values, x, side="right")
+        cumulative_weights = np.concatenate([[0], self.cumulative_weights])
+        return cumulative_weights[below] / cumulative_weights[-1]
+
+    def percentile_rank(self, x: np.ndarray) -> np.ndarray:
+        """Calculates the percentile rank of each of a set of values, from
+        1 to 100, as MicroSeries.percentile_rank does for its own values.
+
+        :param x: Value or array of values.
+        :type x: np.ndarray
+        :returns: Percentile rank of each value.
+        :rtype: np.ndarray
+        """
+        return np.minimum(np.ceil(self.cdf(x) * 100), 100)
+
+    def share(self, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """Calculates the share of the total weighted value held between
+        two percentiles, from the lower percentile's value up to but
+        excluding the upper's. An upper percentile of 1 includes the top.
+        share(0.9, 1) is the top 10% share.
+
+        :param lower: Decimal between 0 and 1 of the lower percentile, or
+            an array of them.
+        :type lower: np.ndarray
+        :param upper: Decimal between 0 and 1 of the upper percentile, or
+            an array of them.
+        :type upper: np.ndarray
+        :returns: Share held between each pair of percentiles.
+        :rtype: np.ndarray
+        """
+        lower, upper = np.broadcast_arrays(
+            np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+        )
+        starts = np.searchsorted(self.values, self.quantile(lower), "left")
+        ends = np.where(
+            upper < 1,
+            np.searchsorted(self.values, self.quantile(upper), "left"),
+            len(self.values),
+        )
+        cumxw = np.concatenate([[0], self.cumulative_weighted_values])
+        return (cumxw[ends] - cumxw[starts]) / cumxw[-1]
+
+    def ranks(self) -> np.ndarray:
+        """Cumulative weight up to and including each value, in the
+        original order."""
+        ranks = np.empty(len(self.order))
+        ranks[self.order] = self.cumulative_weights
+        return ranks
+
+    def quantile_ranks(self, groups: list) -> np.ndarray:
+        """Calculates the quantile rank of each value for several numbers
+        of equally weighted groups, e.g. 10 for decile ranks.
+
+        :param groups: List of numbers of groups.
+        :type groups: list
+        :returns: Array with a row for each value, in the original order,
+            and a column for each number of groups, of ranks from 1 to the
+            number of groups.
+        :rtype: np.ndarray
+        """
+        groups = np.asarray(groups)
+        shares = self.ranks() / self.total_weight
+        return np.minimum(np.ceil(shares[:, None] * groups), groups)
+
+    def gini(self, negatives: str = None) -> float:
+        if self._codes is not None:
+            return counted_gini(*self._codes, self._weights, negatives)
+        # Both transformations preserve the sort order, so only the
+        # cumulative sums need recomputing.
+        sorted_x = self.values.astype("float")
+        weights = self.weights
+        cumxw = self.cumulative_weighted_values
+        cumw = self.cumulative_weights
+        # Missing values are sorted last, and left out with their weights.
+        n = len(sorted_x) - np.count_nonzero(np.isnan(sorted_x))
+        if n == 0:
+            return np.nan
+        if n < len(sorted_x):
+            sorted_x, weights = sorted_x[:n], weights[:n]
+            cumxw, cumw = cumxw[:n], cumw[:n]
+        if negatives == "zero" and sorted_x[0] < 0:
+            sorted_x = np.maximum(sorted_x, 0)
+            cumxw = np.cumsum(sorted_x * weights)
+        if negatives == "shift" and sorted_x[0] < 0:
+            sorted_x = sorted_x - sorted_x[0]
+            cumxw = np.cumsum(sorted_x * weights)
+        if np.any(weights != 1):  # Varying weights.
+            return np.sum(cumxw[1:] * cumw[:-1] - cumxw[:-1] * cumw[1:]) / (
+                cumxw[-1] * cumw[-1]
+            )
+        else:
+            # The above formula, with all weights equal to 1 simplifies to:
+            return (n + 1 - 2 * np.sum(cumxw) / cumxw[-1]) / n
+
+    def top_x_pct_shares(self, top_x_pcts: np.ndarray) -> np.ndarray:
+        thresholds = self.quantile(1 - np.asarray(top_x_pcts, dtype=float))
+        # Values at or above each threshold form the tail of the sorted array.
+        starts = np.searchsorted(self.values, thresholds, side="left")
+        cumxw = self.cumulative_weighted_values
+        total_sum = cumxw[-1]
+        below_sums = np.where(starts > 0, cumxw[np.maximum(starts - 1, 0)], 0)
+        return (total_sum - below_sums) / total_sum
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _StatisticCache:
+    """Least recently used cache of statistics for one version of a
+    MicroSeries. A new version empties it."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.version = None
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version: int, key: tuple, compute: Callable):
+        if version != self.version:
+            self.results.clear()
+            self.version = version
+        try:
+            result = self.results[key]
+        except TypeError:  # Unhashable arguments.
+            return compute()
+        except KeyError:
+            self.misses += 1
+            result = self.results[key] = compute()
+            if len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+            return result
+        self.hits += 1
+        self.results.move_to_end(key)
+        return result
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits, self.misses, self.maxsize, len(self.results)
+        )
+
+
+def _column_quantiles(
+    values: np.array,
+    weights: np.array,
+    quantiles: np.array,
+    n_threads: int = 1,
+) -> np.array:
+    """Calculates weighted quantiles of each row of a 2-D array, sharing one
+    set of weights, with the same interpolation as MicroSeries.quantile.
+
+    :param values: Array with a row of values for each column.
+    :type values: np.array
+    :param weights: Array with one weight per value in a row.
+    :type weights: np.array
+    :param quantiles: Array of quantiles to calculate.
+    :type quantiles: np.array
+    :param n_threads: Number of threads to split the rows over, defaults
+        to 1.
+    :type n_threads: int
+    :returns: Array with a row for each row of values and a column for each
+        quantile.
+    :rtype: np.array
+    """
+    n_rows, n_values = values.shape
+    total_weight = np.sum(weights)
+
+    def sort(rows: np.array) -> tuple:
+        chunk = np.ascontiguousarray(values[rows])
+        order = np.argsort(chunk, axis=1, kind="stable")
+        sorted_values = np.take_along_axis(chunk, order, axis=1)
+        sorted_weights = weights[order]
+        cumulative_weights = np.cumsum(sorted_weights, axis=1)
+        positions = (cumulative_weights - 0.5 * sorted_weights) / total_weight
+        return sorted_values, positions
+
+    # numpy releases the GIL while sorting, so threads sort rows in parallel.
+    chunks = np.array_split(np.arange(n_rows), max(min(n_threads, n_rows), 1))
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(len(chunks)) as pool:
+            sorted_chunks = list(pool.map(sort, chunks))
+    else:
+        sorted_chunks = [sort(chunks[0])]
+    sorted_values = np.concatenate([chunk[0] for chunk in sorted_chunks])
+    positions = np.concatenate([chunk[1] for chunk in sorted_chunks])
+    # Binary search every row for every quantile at once, counting the
+    # positions at or below each quantile.
+    rows = np.arange(n_rows)[:, None]
+    lower = np.zeros((n_rows, len(quantiles)), dtype=np.intp)
+    upper = np.full_like(lower, n_values)
+    active = lower < upper
+    while np.any(active):
+        middle = (lower + upper) // 2
+        at_or_below = positions[rows, np.minimum(middle, n_values - 1)] <= (
+            quantiles
+        )
+        lower = np.where(active & at_or_below, middle + 1, lower)
+        upper = np.where(active & ~at_or_below, middle, upper)
+        active = lower < upper
+    return interpolate_quantiles(
+        sorted_values.ravel(),
+        positions.ravel(),
+        np.full(n_rows, n_values),
+        lower,
+        quantiles,
+    )
+
+
+def _read_only(value):
+    """Returns a read-only view of an array, or of each array in a tuple,
+    and anything else unchanged.
+    """
+    if isinstance(value, tuple):
+        return tuple(_read_only(item) for item in value)
+    if isinstance(value, np.ndarray):
+        value = value.view()
+        value.flags.writeable = False
+    return value
+
+
+# Indexers that copy values shared read-only before writing through them,
+# by calling the object's _copy_shared_values.
+
+
+class _CopyOnWriteLocIndexer(pd.core.indexing._LocIndexer):
+    def __setitem__(self, key, value) -> None:
+        self.obj._copy_shared_values()
+        super().__setitem__(key, value)
+
+
+class _CopyOnWriteILocIndexer(pd.core.indexing._iLocIndexer):
+    def __setitem__(self, key, value) -> None:
+        self.obj._copy_shared_values()
+        super().__setitem__(key, value)
+
+
+class _CopyOnWriteAtIndexer(pd.core.indexing._AtIndexer):
+    def __setitem__(self, key, value) -> None:
+        self.obj._copy_shared_values()
+        super().__setitem__(key, value)
+
+
+class _CopyOnWriteIAtIndexer(pd.core.indexing._iAtIndexer):
+    def __setitem__(self, key, value) -> None:
+        self.obj._copy_shared_values()
+        super().__setitem__(key, value)
+
+
+class _SharedWeights(pd.Series):
+    """Weights of one MicroSeries or MicroDataFrame over a float64 buffer
+    shared read-only with those derived from it. Changing them in place,
+    through [], .loc, .iloc, .at, .iat, update or a method called with
+    inplace=True, first copies the buffer, so only the owner's weights
+    change, and tells the owner. In-place operators return a new Series
+    instead, so ``s.weights *= 2`` assigns new weights to s alone.
+    """
+
+    _internal_names = pd.Series._internal_names + ["_on_write"]
+    _internal_names_set = set(_internal_names)
+    _on_write = None
+
+    def _copy_shared_values(self) -> None:
+        """Copies the buffer if it's shared and tells the owner, before the
+        weights change in place.
+        """
+        if not self._values.flags.writeable:
+            self._mgr = self._mgr.copy(deep=True)
+        on_write = None if self._on_write is None else self._on_write()
+        if on_write is not None:
+            on_write()
+
+    def _inplace_method(self, other, op):
+        return op(self, other)
+
+    def __setitem__(self, key, value) -> None:
+        self._copy_shared_values()
+        super().__setitem__(key, value)
+
+    @property
+    def loc(self) -> _CopyOnWriteLocIndexer:
+        return _CopyOnWriteLocIndexer("loc", self)
+
+    @property
+    def iloc(self) -> _CopyOnWriteILocIndexer:
+        return _CopyOnWriteILocIndexer("iloc", self)
+
+    @property
+    def at(self) -> _CopyOnWriteAtIndexer:
+        return _CopyOnWriteAtIndexer("at", self)
+
+    @property
+    def iat(self) -> _CopyOnWriteIAtIndexer:
+        return _CopyOnWriteIAtIndexer("iat", self)
+
+    def update(self, other) -> None:
+        self._copy_shared_values()
+        super().update(other)
+
+
+def _copy_before_inplace(cls: type, name: str) -> Callable:
+    """Builds a method that copies shared values before the pandas method
+    changes them with inplace=True.
+
+    :param cls: The pandas class, pd.Series or pd.DataFrame.
+    :type cls: type
+    :param name: Name of the pandas method.
+    :type name: str
+    """
+    fn = getattr(cls, name)
+
+    @wraps(fn)
+    def inplace_fn(self, *args, **kwargs):
+        if kwargs.get("inplace"):
+            self._copy_shared_values()
+        return fn(self, *args, **kwargs)
+
+    return inplace_fn
+
+
+def _takes_inplace(fn) -> bool:
+    try:
+        return "inplace" in signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+# Which methods take inplace varies with the pandas version.
+for _name in dir(pd.Series):
+    if not _name.startswith("_") and _takes_inplace(
+        getattr(pd.Series, _name)
+    ):
+        setattr(
+            _SharedWeights, _name, _copy_before_inplace(pd.Series, _name)
+        )
+
+
+def _shared_weights(weights, on_write: Callable = None) -> _SharedWeights:
+    """Returns weights as _SharedWeights, sharing the buffer of weights that
+    already are without a copy.
+
+    :param weights: Array or Series of weights.
+    :param on_write: Bound method of the owner to call before the weights
+        are written to in place.
+    :returns: Read-only float64 weights.
+    :rtype: _SharedWeights
+    """
+    if isinstance(weights, _SharedWeights):
+        # Sharing makes the buffer read-only again, so whichever side
+        # writes first copies it.
+        buffer = weights._values
+        buffer.flags.writeable = False
+    else:
+        # A read-only view, so the caller's own array stays writeable.
+        # Float64 input isn't copied.
+        buffer = np.asarray(weights, dtype=float).view()
+        buffer.flags.writeable = False
+    if isinstance(weights, pd.Series):
+        result = _SharedWeights(buffer, index=weights.index, name=weights.name)
+    else:
+        result = _SharedWeights(buffer)
+    if on_write is not None:
+        result._on_write = weakref.WeakMethod(on_write)
+    return result
+
 
 class MicroSeries(pd.Series):
+    _internal_names = pd.Series._internal_names + [
+        "_weights",
+        "_sort_cache",
+        "_statistic_cache",
+        "_version",
+    ]
+    _internal_names_set = set(_internal_names)
+
     def __init__(self, *args, weights: np.array = None, **kwargs):
         """A Series-inheriting class for weighted microdata.
         Weights can be provided at initialisation, or using set_weights.
@@ -29,8 +520,18 @@ class MicroSeries(pd.Series):
 
     @weighted_function
     def scalar_function(fn: Callable) -> Callable:
-        fn._rtype = float
-        return fn
+        @wraps(fn)
+        def memoized_fn(self, *args, **kwargs):
+            cache = getattr(self, "_statistic_cache", None)
+            if cache is None:
+                return fn(self, *args, **kwargs)
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            return cache.get(
+                self._version, key, lambda: fn(self, *args, **kwargs)
+            )
+
+        memoized_fn._rtype = float
+        return memoized_fn
 
     @weighted_function
     def vector_function(fn: Callable) -> Callable:
@@ -38,15 +539,119 @@ class MicroSeries(pd.Series):
         return fn
 
     def set_weights(self, weights: np.array) -> None:
-        """Sets the weight values.
+        """Sets the weight values. The weights are shared with MicroSeries
+        derived from this one without copying, and copied before any of
+        them writes to its weights in place.
 
         :param weights: Array of weights.
         :type weights: np.array.
         """
         if weights is None:
-            self.weights = pd.Series(np.ones_like(self.values), dtype=float)
-        else:
-            self.weights = pd.Series(weights, dtype=float)
+            weights = np.ones(len(self))
+        self._weights = _shared_weights(weights, self._clear_sort_cache)
+        self._clear_sort_cache()
+
+    @property
+    def weights(self) -> pd.Series:
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: np.array) -> None:
+        self.set_weights(weights)
+
+    def _clear_sort_cache(self) -> None:
+        """Drops the cached sort order and moves to a new version, which
+        invalidates memoized statistics. Called whenever the values or
+        weights change.
+        """
+        self._sort_cache = None
+        self._version = getattr(self, "_version", 0) + 1
+
+    def memoize(self, maxsize: int = 128) -> "MicroSeries":
+        """Turns on memoization of scalar statistics such as gini, median
+        and top_10_pct_share. Results are kept by method and arguments until
+        the values or weights change through pandas or MicroSeries methods.
+        Writing to the underlying array directly isn't detected.
+
+        :param maxsize: Number of results to keep, dropping the least
+            recently used, defaults to 128. 0 turns memoization off.
+        :type maxsize: int
+        :returns: The MicroSeries itself.
+        :rtype: MicroSeries
+        """
+        self._statistic_cache = _StatisticCache(maxsize) if maxsize else None
+        return self
+
+    def cache_info(self) -> Union["CacheInfo", None]:
+        """Reports hits and misses of the memoized statistics.
+
+        :returns: CacheInfo of hits, misses, maxsize and currsize, or None if
+            memoization is off.
+        :rtype: CacheInfo
+        """
+        cache = getattr(self, "_statistic_cache", None)
+        return None if cache is None else cache.info()
+
+    def ecdf(self) -> WeightedECDF:
+        """Returns the weighted empirical distribution of the MicroSeries,
+        for answering many quantile, percentile rank and share queries in
+        logarithmic time each. It is a read-only snapshot of the values and
+        weights at the time of the call, unaffected by later changes to the
+        MicroSeries, and starts from whatever the MicroSeries' own
+        statistics have already sorted.
+
+        :returns: Weighted ECDF of the values.
+        :rtype: WeightedECDF
+        """
+        ecdf = self._weighted_sort()
+        # The weights are read-only already; the values are copied.
+        snapshot = WeightedECDF(
+            _read_only(np.array(ecdf._values)),
+            ecdf._weights,
+            ecdf._small_range,
+        )
+        for name, value in vars(ecdf).items():
+            vars(snapshot).setdefault(name, _read_only(value))
+        return snapshot
+
+    def sketch(self, compression: float = 1000) -> WeightedQuantileSketch:
+        """Summarises the MicroSeries in a mergeable quantile sketch, e.g.
+        to combine quantiles of partitions processed separately.
+
+        :param compression: Size of the sketch, as in
+            WeightedQuantileSketch, defaults to 1000.
+        :type compression: float
+        :returns: Sketch of the values and weights.
+        :rtype: WeightedQuantileSketch
+        """
+        return WeightedQuantileSketch(compression).update(
+            self.values, self.weights.values
+        )
+
+    def summary(self, bins: np.array = None) -> WeightedSummary:
+        """Summarises the MicroSeries in a mergeable WeightedSummary, e.g.
+        to combine statistics of partitions processed separately.
+
+        :param bins: Array of histogram bin edges, defaults to no
+            histogram.
+        :type bins: np.array
+        :returns: Summary of the values and weights.
+        :rtype: WeightedSummary
+        """
+        return WeightedSummary(bins).update(self.values, self.weights.values)
+
+    def _weighted_sort(self) -> WeightedECDF:
+        """Returns the sort order and cumulative weights of the MicroSeries,
+        building them on first use.
+
+        :returns: Cached sort of the values and weights.
+        :rtype: WeightedECDF
+        """
+        if self._sort_cache is None:
+            self._sort_cache = WeightedECDF(
+                np.asarray(self.values), np.asarray(self.weights.values)
+            )
+        return self._sort_cache
 
     @vector_function
     def weight(self) -> pd.Series:
@@ -95,18 +700,20 @@ class MicroSeries(pd.Series):
         :return: Array of weighted quantiles.
         :rtype: pd.Series
         """
-        values = np.array(self.values)
         quantiles = np.array(q)
-        sample_weight = np.array(self.weights)
         assert np.all(quantiles >= 0) and np.all(
             quantiles <= 1
         ), "quantiles should be in [0, 1]"
-        sorter = np.argsort(values)
-        values = values[sorter]
-        sample_weight = sample_weight[sorter]
-        weighted_quantiles = np.cumsum(sample_weight) - 0.5 * sample_weight
-        weighted_quantiles /= np.sum(sample_weight)
-        result = np.interp(quantiles, weighted_quantiles, values)
+        if (
+            self._sort_cache is None
+            and quantiles.size <= MAX_SELECTED_QUANTILES
+        ):
+            # A few quantiles are found faster without the full sort.
+            result = select_quantiles(
+                np.asarray(self.values), self.weights.values, quantiles
+            )
+        else:
+            result = self._weighted_sort().quantile(quantiles)
         if quantiles.shape == ():
             return result
         return pd.Series(result, index=quantiles)
@@ -135,26 +742,7 @@ class MicroSeries(pd.Series):
         :returns: Gini index.
         :rtype: float
         """
-        x = np.array(self).astype("float")
-        if negatives == "zero":
-            x[x < 0] = 0
-        if negatives == "shift" and np.amin(x) < 0:
-            x -= np.amin(x)
-        if (self.weights != np.ones(len(self))).any():  # Varying weights.
-            sorted_indices = np.argsort(self)
-            sorted_x = np.array(self[sorted_indices])
-            sorted_w = np.array(self.weights[sorted_indices])
-            cumw = np.cumsum(sorted_w)
-            cumxw = np.cumsum(sorted_x * sorted_w)
-            return np.sum(cumxw[1:] * cumw[:-1] - cumxw[:-1] * cumw[1:]) / (
-                cumxw[-1] * cumw[-1]
-            )
-        else:
-            sorted_x = np.sort(self)
-            n = len(x)
-            cumxw = np.cumsum(sorted_x)
-            # The above formula, with all weights equal to 1 simplifies to:
-            return (n + 1 - 2 * np.sum(cumxw) / cumxw[-1]) / n
+        return self._weighted_sort().gini(negatives)
 
     @scalar_function
     def top_x_pct_share(self, top_x_pct: float) -> float:
@@ -166,10 +754,17 @@ class MicroSeries(pd.Series):
         :returns: The weighted share held by the top x%.
         :rtype: float
         """
-        threshold = self.quantile(1 - top_x_pct)
-        top_x_pct_sum = self[self >= threshold].sum()
-        total_sum = self.sum()
-        return top_x_pct_sum / total_sum
+        return self._top_x_pct_shares([top_x_pct])[0]
+
+    def _top_x_pct_shares(self, top_x_pcts: np.array) -> np.array:
+        """Calculates several top x% shares from the cached sort.
+
+        :param top_x_pcts: Decimals between 0 and 1 of the top %.
+        :type top_x_pcts: np.array
+        :returns: The weighted share held by each top x%.
+        :rtype: np.array
+        """
+        return self._weighted_sort().top_x_pct_shares(top_x_pcts)
 
     @scalar_function
     def bottom_x_pct_share(self, bottom_x_pct) -> float:
@@ -236,9 +831,63 @@ class MicroSeries(pd.Series):
             the weighted share held by the bottom 50%.
 
         """
-        t10 = self.top_10_pct_share()
-        b50 = self.bottom_50_pct_share()
-        return t10 / b50
+        t10, t50 = self._top_x_pct_shares([0.1, 0.5])
+        return t10 / (1 - t50)
+
+    @vector_function
+    def inequality_summary(
+        self,
+        quantiles: np.array = (0.1, 0.25, 0.5, 0.75, 0.9),
+        top_shares: np.array = (0.1, 0.01, 0.001),
+        bottom_shares: np.array = (0.5,),
+    ) -> pd.Series:
+        """Calculates the Gini index, top 10% to bottom 50% ratio, top and
+        bottom x% shares and weighted quantiles from a single sort.
+
+        :param quantiles: Quantiles to calculate, defaults to
+            (0.1, 0.25, 0.5, 0.75, 0.9).
+        :type quantiles: np.array
+        :param top_shares: Decimals between 0 and 1 of the top %, defaults to
+            (0.1, 0.01, 0.001).
+        :type top_shares: np.array
+        :param bottom_shares: Decimals between 0 and 1 of the bottom %,
+            defaults to (0.5,).
+        :type bottom_shares: np.array
+        :returns: Series indexed by statistic, e.g. "gini",
+            "top_10_pct_share", "bottom_50_pct_share" and "quantile_0.5".
+        :rtype: pd.Series
+        """
+        quantiles = np.asarray(quantiles, dtype=float)
+        top_shares = np.asarray(top_shares, dtype=float)
+        bottom_shares = np.asarray(bottom_shares, dtype=float)
+        # Bottom x% shares are one minus the top (1 - x)% shares. The top
+        # 10% and bottom 50% shares are always needed for t10_b50.
+        shares = self._top_x_pct_shares(
+            np.concatenate([top_shares, 1 - bottom_shares, [0.1, 0.5]])
+        )
+        top, bottom_complement, (t10, t50) = np.split(
+            shares, [len(top_shares), len(top_shares) + len(bottom_shares)]
+        )
+        quantile_values = self._weighted_sort().quantile(quantiles)
+
+        def pct_label(x):
+            return f"{x * 100:g}".replace(".", "_")
+
+        index = (
+            ["gini", "t10_b50"]
+            + [f"top_{pct_label(x)}_pct_share" for x in top_shares]
+            + [f"bottom_{pct_label(x)}_pct_share" for x in bottom_shares]
+            + [f"quantile_{q:g}" for q in quantiles]
+        )
+        values = np.concatenate(
+            [
+                [self.gini(), t10 / (1 - t50)],
+                top,
+                1 - bottom_complement,
+                quantile_values,
+            ]
+        )
+        return pd.Series(values, index=index)
 
     @vector_function
     def cumsum(self) -> pd.Series:
@@ -246,40 +895,64 @@ class MicroSeries(pd.Series):
 
     @vector_function
     def rank(self, pct=False) -> pd.Series:
-        order = np.argsort(self.values)
-        inverse_order = np.argsort(order)
-        ranks = np.array(self.weights.values)[order].cumsum()[inverse_order]
+        ranks = self._weighted_sort().ranks()
         if pct:
             ranks /= self.weights.values.sum()
             np.where(ranks > 1.0, 1.0, ranks)
         return pd.Series(ranks, index=self.index)
 
+    def quantile_ranks(self, groups: list = (100, 10, 5, 4)) -> pd.DataFrame:
+        """Calculates quantile ranks for several numbers of groups from one
+        sort, e.g. percentile, decile, quintile and quartile ranks together.
+
+        :param groups: List of numbers of equally weighted groups, defaults
+            to percentiles, deciles, quintiles and quartiles.
+        :type groups: list
+        :returns: DataFrame with a column of ranks, from 1 to the number of
+            groups, for each number of groups.
+        :rtype: pd.DataFrame
+        """
+        return pd.DataFrame(
+            self._weighted_sort().quantile_ranks(groups),
+            index=self.index,
+            columns=list(groups),
+        )
+
+    def _quantile_rank(self, groups: int) -> "MicroSeries":
+        ranks = self._weighted_sort().quantile_ranks([groups])[:, 0]
+        return MicroSeries(ranks, index=self.index)
+
     @vector_function
     def decile_rank(self):
-        return MicroSeries(np.minimum(np.ceil(self.rank(pct=True) * 10), 10))
+        return self._quantile_rank(10)
 
     @vector_function
     def quintile_rank(self):
-        return MicroSeries(np.minimum(np.ceil(self.rank(pct=True) * 5), 5))
+        return self._quantile_rank(5)
 
     @vector_function
     def quartile_rank(self):
-        return MicroSeries(np.minimum(np.ceil(self.rank(pct=True) * 4), 4))
+        return self._quantile_rank(4)
 
     @vector_function
     def percentile_rank(self):
-        return MicroSeries(np.minimum(np.ceil(self.rank(pct=True) * 100), 100))
+        return self._quantile_rank(100)
 
     def groupby(self, *args, **kwargs):
+        group_index = None
+        if len(args) > 0 and isinstance(args[0], GroupIndex):
+            group_index = args[0]
+            group_index.check_length(len(self))
+            args = (group_index.keys,) + args[1:]
         gb = super().groupby(*args, **kwargs)
         gb.__class__ = MicroSeriesGroupBy
-        gb._init()
-        gb.weights = pd.Series(self.weights).groupby(*args, **kwargs)
+        gb._init(self.weights.values, group_index)
         return gb
 
     def copy(self, deep=True):
         res = super().copy(deep)
-        res = MicroSeries(res, weights=self.weights.copy(deep))
+        # The weights are read-only, so the copy can share them.
+        res = MicroSeries(res, weights=self.weights)
         return res
 
     def equals(self, other) -> bool:
@@ -287,15 +960,80 @@ class MicroSeries(pd.Series):
         equal_weights = self.weights.equals(other.weights)
         return equal_values and equal_weights
 
+    def _to_frame(self) -> "MicroDataFrame":
+        """Returns the MicroSeries as a one-column MicroDataFrame with the
+        same weights, named "value" if the MicroSeries has no name.
+        """
+        name = "value" if self.name is None else self.name
+        return MicroDataFrame(
+            {name: self.values}, index=self.index, weights=self.weights.values
+        )
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """Writes the MicroSeries to a Parquet file as a one-column
+        MicroDataFrame, keeping the weights for microdf.read_parquet.
+        Requires pyarrow.
+
+        :param path: Path of the file.
+        :type path: str
+        :param **kwargs: Arguments passed to MicroDataFrame.to_parquet.
+        """
+        self._to_frame().to_parquet(path, **kwargs)
+
+    def to_feather(self, path: str, **kwargs) -> None:
+        """Writes the MicroSeries to a Feather file as a one-column
+        MicroDataFrame, keeping the weights for microdf.read_feather.
+        Requires pyarrow.
+
+        :param path: Path of the file.
+        :type path: str
+        :param **kwargs: Arguments passed to MicroDataFrame.to_feather.
+        """
+        self._to_frame().to_feather(path, **kwargs)
+
+    def _aligned_weights(self) -> pd.Series:
+        """Returns the weights indexed like the values, without copying,
+        so any key selects the same rows from both.
+        """
+        return pd.Series(self.weights.values, index=self.index, copy=False)
+
     def __getitem__(self, key):
         result = super().__getitem__(key)
         if isinstance(result, pd.Series):
-            weights = self.weights.__getitem__(key)
+            weights = self._aligned_weights()[key]
             return MicroSeries(result, weights=weights)
         return result
 
-    def __getattr__(self, name):
-        return MicroSeries(super().__getattr__(name), weights=self.weights)
+    @property
+    def loc(self) -> "_WeightedLocIndexer":
+        return _WeightedLocIndexer("loc", self)
+
+    @property
+    def iloc(self) -> "_WeightedILocIndexer":
+        return _WeightedILocIndexer("iloc", self)
+
+    def take(self, indices, *args, **kwargs) -> "MicroSeries":
+        result = super().take(indices, *args, **kwargs)
+        return MicroSeries(result, weights=self.weights.take(indices))
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._clear_sort_cache()
+
+    def _inplace_method(self, other, op):
+        if isinstance(self._values, np.ndarray) and (
+            not self._values.flags.writeable
+        ):
+            # Values shared read-only, e.g. by a copy-on-write copy: return
+            # a new Series for the caller to assign instead.
+            return op(self, other)
+        return super()._inplace_method(other, op)
+
+    def _maybe_update_cacher(self, *args, **kwargs):
+        # pandas calls this after modifying the values in place, e.g. through
+        # .loc, .iloc or inplace=True methods.
+        self._clear_sort_cache()
+        super()._maybe_update_cacher(*args, **kwargs)
 
     # operators
 
@@ -343,28 +1081,44 @@ class MicroSeries(pd.Series):
     # assignment operators
 
     def __iadd__(self, other):
-        return MicroSeries(super().__iadd__(other), weights=self.weights)
+        result = super().__iadd__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __isub__(self, other):
-        return MicroSeries(super().__isub__(other), weights=self.weights)
+        result = super().__isub__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __imul__(self, other):
-        return MicroSeries(super().__imul__(other), weights=self.weights)
+        result = super().__imul__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __ifloordiv__(self, other):
-        return MicroSeries(super().__ifloordiv__(other), weights=self.weights)
+        result = super().__ifloordiv__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __idiv__(self, other):
-        return MicroSeries(super().__idiv__(other), weights=self.weights)
+        result = super().__idiv__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __itruediv__(self, other):
-        return MicroSeries(super().__itruediv__(other), weights=self.weights)
+        result = super().__itruediv__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __imod__(self, other):
-        return MicroSeries(super().__imod__(other), weights=self.weights)
+        result = super().__imod__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     def __ipow__(self, other):
-        return MicroSeries(super().__ipow__(other), weights=self.weights)
+        result = super().__ipow__(other)
+        self._clear_sort_cache()
+        return MicroSeries(result, weights=self.weights)
 
     # other
 
@@ -403,93 +1157,329 @@ MicroSeries.FUNCTIONS = sum(
 )
 
 
+class _WeightedLocIndexer(pd.core.indexing._LocIndexer):
+    # Selects the weights' rows with the same key, so .loc, and head() and
+    # tail() through .iloc, give MicroSeries.
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        if isinstance(result, pd.Series):
+            weights = self.obj._aligned_weights().loc[key]
+            return MicroSeries(result, weights=weights)
+        return result
+
+
+class _WeightedILocIndexer(pd.core.indexing._iLocIndexer):
+    def __getitem__(self, key):
+        result = super().__getitem__(key)
+        if isinstance(result, pd.Series):
+            weights = self.obj._aligned_weights().iloc[key]
+            return MicroSeries(result, weights=weights)
+        return result
+
+
+# pandas methods that give a value for each row, whose results keep the
+# MicroSeries' weights.
+MicroSeries.ELEMENTWISE_FUNCTIONS = [
+    "abs",
+    "astype",
+    "between",
+    "clip",
+    "fillna",
+    "isna",
+    "isnull",
+    "mask",
+    "notna",
+    "notnull",
+    "replace",
+    "round",
+    "where",
+]
+
+
+def _elementwise(name: str) -> Callable:
+    """Builds a MicroSeries method that calls the pandas method and keeps
+    the weights on its result.
+
+    :param name: Name of the pd.Series method.
+    :type name: str
+    """
+    fn = getattr(pd.Series, name)
+
+    @wraps(fn)
+    def elementwise_fn(self, *args, **kwargs):
+        result = fn(self, *args, **kwargs)
+        # None when done in place.
+        if isinstance(result, pd.Series):
+            return MicroSeries(result, weights=self.weights)
+        return result
+
+    return elementwise_fn
+
+
+for _name in MicroSeries.ELEMENTWISE_FUNCTIONS:
+    setattr(MicroSeries, _name, _elementwise(_name))
+
+
 class MicroSeriesGroupBy(pd.core.groupby.generic.SeriesGroupBy):
-    def _init(self):
-        def _weighted_agg(name) -> Callable:
-            def via_micro_series(row, *args, **kwargs):
-                return getattr(MicroSeries(row.a, weights=row.w), name)(
-                    *args, **kwargs
-                )
+    # Computed for all groups at once from a GroupIndex, rather than through
+    # a MicroSeries per group.
+    VECTORISED_FUNCTIONS = [
+        "sum",
+        "count",
+        "mean",
+        "quantile",
+        "median",
+        "rank",
+        "decile_rank",
+        "quintile_rank",
+        "quartile_rank",
+        "percentile_rank",
+    ]
+
+    def _init(self, weights: np.array, group_index: GroupIndex = None):
+        """Attaches the weights, and the GroupIndex if already known.
+
+        :param weights: Array of weights, aligned with the grouped values.
+        :type weights: np.array
+        :param group_index: GroupIndex of the grouping, built on first use
+            if not given.
+        :type group_index: GroupIndex
+        """
+        self.weights = np.asarray(weights, dtype=float)
+        self._group_index_cache = group_index
 
-            fn = getattr(MicroSeries, name)
+    def _group_index(self) -> GroupIndex:
+        if self._group_index_cache is None:
+            self._group_index_cache = GroupIndex.from_groupby(self)
+        return self._group_index_cache
 
-            @wraps(fn)
-            def _weighted_agg_fn(*args, **kwargs):
-                arrays = self.apply(np.array)
-                weights = self.weights.apply(np.array)
-                df = pd.DataFrame(dict(a=arrays, w=weights))
-                is_array = len(args) > 0 and hasattr(args[0], "__len__")
-                if (
-                    name in MicroSeries.SCALAR_FUNCTIONS
-                    or name in MicroSeries.AGNOSTIC_FUNCTIONS
-                    and not is_array
-                ):
-                    result = df.agg(
-                        lambda row: via_micro_series(row, *args, **kwargs),
-                        axis=1,
-                    )
-                elif (
-                    name in MicroSeries.VECTOR_FUNCTIONS
-                    or name in MicroSeries.AGNOSTIC_FUNCTIONS
-                    and is_array
-                ):
-                    result = df.apply(
-                        lambda row: via_micro_series(row, *args, **kwargs),
-                        axis=1,
-                    )
-                    return result.stack()
-                return result
-
-            return _weighted_agg_fn
-
-        for fn_name in MicroSeries.FUNCTIONS:
-            setattr(self, fn_name, _weighted_agg(fn_name))
+    def _values_and_weights(self) -> tuple:
+        return np.asarray(self.obj.values, dtype=float), self.weights
+
+    def sum(self) -> pd.Series:
+        """Calculates the weighted sum of each group.
+
+        :returns: The weighted sum of each group.
+        :rtype: pd.Series
+        """
+        group_index = self._group_index()
+        values, weights = self._values_and_weights()
+        weighted = values * weights
+        # Missing values count as zero, as in MicroSeries.sum.
+        weighted[np.isnan(weighted)] = 0
+        return pd.Series(group_index.sum(weighted), index=group_index.groups)
+
+    def count(self) -> pd.Series:
+        """Calculates the weighted count of each group.
+
+        :returns: The weighted count of each group.
+        :rtype: pd.Series
+        """
+        group_index = self._group_index()
+        _, weights = self._values_and_weights()
+        return pd.Series(group_index.sum(weights), index=group_index.groups)
+
+    def mean(self) -> pd.Series:
+        """Calculates the weighted mean of each group.
+
+        :returns: The weighted mean of each group.
+        :rtype: pd.Series
+        """
+        group_index = self._group_index()
+        values, weights = self._values_and_weights()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = group_index.sum(values * weights) / group_index.sum(
+                weights
+            )
+        return pd.Series(means, index=group_index.groups)
+
+    def quantile(self, q: np.array) -> pd.Series:
+        """Calculates weighted quantiles of each group.
+
+        :param q: Quantile or array of quantiles to calculate.
+        :type q: np.array
+        :returns: Series indexed by group for a single quantile, or by group
+            and quantile for an array of quantiles.
+        :rtype: pd.Series
+        """
+        group_index = self._group_index()
+        values, weights = self._values_and_weights()
+        quantiles = np.array(q)
+        assert np.all(quantiles >= 0) and np.all(
+            quantiles <= 1
+        ), "quantiles should be in [0, 1]"
+        result = group_index.quantile(values, weights, quantiles)
+        if quantiles.shape == ():
+            return pd.Series(result[:, 0], index=group_index.groups)
+        return pd.DataFrame(
+            result, index=group_index.groups, columns=quantiles
+        ).stack()
+
+    def median(self) -> pd.Series:
+        """Calculates the weighted median of each group.
+
+        :returns: The weighted median of each group.
+        :rtype: pd.Series
+        """
+        return self.quantile(0.5)
+
+    def rank(self, pct=False) -> pd.Series:
+        """Calculates the weighted rank of each value within its group.
+
+        :param pct: Whether to return ranks as a fraction of the group's
+            total weight.
+        :type pct: bool
+        :returns: Ranks indexed by group and position within the group.
+        :rtype: pd.Series
+        """
+        group_index = self._group_index()
+        values, weights = self._values_and_weights()
+        order = group_index.sort(values)
+        ranks = group_index.cumsum(weights[order])
+        if pct:
+            totals = group_index.sum(weights)
+            ranks /= np.repeat(totals, group_index.counts)
+        row_ranks = np.empty(len(values))
+        row_ranks[order] = ranks
+        return pd.Series(
+            row_ranks[group_index.order], index=group_index.stacked_index()
+        )
+
+    def decile_rank(self) -> pd.Series:
+        return np.minimum(np.ceil(self.rank(pct=True) * 10), 10)
+
+    def quintile_rank(self) -> pd.Series:
+        return np.minimum(np.ceil(self.rank(pct=True) * 5), 5)
+
+    def quartile_rank(self) -> pd.Series:
+        return np.minimum(np.ceil(self.rank(pct=True) * 4), 4)
+
+    def percentile_rank(self) -> pd.Series:
+        return np.minimum(np.ceil(self.rank(pct=True) * 100), 100)
+
+
+def _per_group(name: str) -> Callable:
+    """Builds a MicroSeriesGroupBy method that calls a MicroSeries method on
+    each group in turn, for functions without a vectorised form.
+
+    :param name: Name of the MicroSeries method.
+    :type name: str
+    """
+    fn = getattr(MicroSeries, name)
+
+    @wraps(fn)
+    def per_group_fn(self, *args, **kwargs):
+        group_index = self._group_index()
+        values = np.asarray(self.obj.values)
+        nonempty = np.flatnonzero(group_index.counts)
+        rows = np.split(group_index.order, group_index.starts[nonempty][1:])
+        results = [
+            getattr(MicroSeries(values[r], weights=self.weights[r]), name)(
+                *args, **kwargs
+            )
+            for r in rows
+        ]
+        groups = group_index.groups[nonempty]
+        is_array = len(args) > 0 and hasattr(args[0], "__len__")
+        if (
+            name in MicroSeries.SCALAR_FUNCTIONS
+            or name in MicroSeries.AGNOSTIC_FUNCTIONS
+            and not is_array
+        ):
+            return pd.Series(results, index=groups)
+        return pd.concat(results, keys=groups)
+
+    return per_group_fn
+
+
+for _name in MicroSeries.FUNCTIONS:
+    if _name not in MicroSeriesGroupBy.VECTORISED_FUNCTIONS:
+        setattr(MicroSeriesGroupBy, _name, _per_group(_name))
 
 
 class MicroDataFrameGroupBy(pd.core.groupby.generic.DataFrameGroupBy):
-    def _init(self, by: Union[str, list]):
-        self.columns = list(self.obj.columns)
-        if isinstance(by, list):
-            for column in by:
-                self.columns.remove(column)
-        elif isinstance(by, str):
-            self.columns.remove(by)
-        self.columns.remove("__tmp_weights")
-        for fn_name in MicroSeries.SCALAR_FUNCTIONS:
-
-            def get_fn(name):
-                def fn(*args, **kwargs):
-                    return MicroDataFrame(
-                        {
-                            col: getattr(getattr(self, col), name)(
-                                *args, **kwargs
-                            )
-                            for col in self.columns
-                        }
-                    )
-
-                return fn
-
-            setattr(self, fn_name, get_fn(fn_name))
-        for fn_name in MicroSeries.VECTOR_FUNCTIONS:
-
-            def get_fn(name):
-                def fn(*args, **kwargs):
-                    return MicroDataFrame(
-                        {
-                            col: getattr(getattr(self, col), name)(
-                                *args, **kwargs
-                            )
-                            for col in self.columns
-                        }
-                    )
-
-                return fn
-
-            setattr(self, fn_name, get_fn(fn_name))
+    def _init(self, by, weights: np.array, group_index: GroupIndex = None):
+        """Attaches the weights and grouping. Column groupbys are only built
+        when a column is accessed, and share these.
+
+        :param by: What the frame was grouped by.
+        :param weights: Array of weights, aligned with the frame's rows.
+        :type weights: np.array
+        :param group_index: GroupIndex of the grouping, built on first use
+            if not given.
+        :type group_index: GroupIndex
+        """
+        self.weights = weights
+        self._by = by
+        self._group_index_cache = group_index
+        names = by.by if isinstance(by, GroupIndex) else by
+        if not isinstance(names, list):
+            names = [names]
+        keys = [name for name in names if pd.api.types.is_hashable(name)]
+        self.columns = [
+            col for col in self._selected_obj.columns if col not in keys
+        ]
+
+    def _group_index(self) -> GroupIndex:
+        if self._group_index_cache is None:
+            self._group_index_cache = GroupIndex.from_groupby(self)
+        return self._group_index_cache
+
+    def __getitem__(self, key):
+        return self._wrap(super().__getitem__(key))
+
+    def _column(self, col) -> "MicroSeriesGroupBy":
+        # Unlike __getitem__, also works once columns have been selected.
+        return self._wrap(self._gotitem(col, ndim=1))
+
+    def _wrap(self, result):
+        if isinstance(result, pd.core.groupby.generic.SeriesGroupBy):
+            result.__class__ = MicroSeriesGroupBy
+            result._init(self.weights, self._group_index())
+        elif isinstance(result, pd.core.groupby.generic.DataFrameGroupBy):
+            result.__class__ = MicroDataFrameGroupBy
+            result._init(self._by, self.weights, self._group_index())
+        return result
+
+
+def _column_wise(name: str) -> Callable:
+    """Builds a MicroDataFrameGroupBy method that applies a weighted function
+    to each column's groupby.
+
+    :param name: Name of the MicroSeries method.
+    :type name: str
+    """
+    fn = getattr(MicroSeries, name)
+
+    @wraps(fn)
+    def column_wise_fn(self, *args, **kwargs):
+        return MicroDataFrame(
+            {
+                col: getattr(self._column(col), name)(*args, **kwargs)
+                for col in self.columns
+            }
+        )
+
+    return column_wise_fn
+
+
+for _name in MicroSeries.SCALAR_FUNCTIONS + MicroSeries.VECTOR_FUNCTIONS:
+    setattr(MicroDataFrameGroupBy, _name, _column_wise(_name))
 
 
 class MicroDataFrame(pd.DataFrame):
+    _internal_names = pd.DataFrame._internal_names + [
+        "_weights",
+        "weights",
+        "weights_col",
+        "weight_col",
+        "_shared_values",
+    ]
+    _internal_names_set = set(_internal_names)
+    # Values shared with copy-on-write copies, which are copied before
+    # pandas writes to them in place.
+    _shared_values = ()
+
     def __init__(self, *args, weights=None, **kwargs):
         """A DataFrame-inheriting class for weighted microdata.
         Weights can be provided at initialisation, or using set_weights or
@@ -499,47 +1489,108 @@ class MicroDataFrame(pd.DataFrame):
         :type weights: np.array
         """
         super().__init__(*args, **kwargs)
-        self.weights = None
+        self._weights = None
         self.set_weights(weights)
         self._link_all_weights()
-        self.override_df_functions()
-
-    def override_df_functions(self):
-        for name in MicroSeries.FUNCTIONS:
-
-            def get_fn(name):
-                def fn(*args, **kwargs):
-                    is_array = len(args) > 0 and hasattr(args[0], "__len__")
-                    if (
-                        name in MicroSeries.SCALAR_FUNCTIONS
-                        or name in MicroSeries.AGNOSTIC_FUNCTIONS
-                        and not is_array
-                    ):
-                        results = pd.Series(
-                            [
-                                getattr(self[col], name)(*args, **kwargs)
-                                for col in self.columns
-                            ]
-                        )
-                        results.index = self.columns
-                        return results
-                    elif (
-                        name in MicroSeries.VECTOR_FUNCTIONS
-                        or name in MicroSeries.AGNOSTIC_FUNCTIONS
-                        and is_array
-                    ):
-                        results = pd.DataFrame(
-                            [
-                                getattr(self[col], name)(*args, **kwargs)
-                                for col in self.columns
-                            ]
-                        )
-                        results.index = self.columns
-                        return results
-
-                return fn
-
-            setattr(self, name, get_fn(name))
+
+    # Weighted statistics computed for all numeric columns at once.
+    LINEAR_FUNCTIONS = ["sum", "count", "mean"]
+
+    def _weight_array(self) -> np.array:
+        if self.weights is None:
+            return np.ones(len(self))
+        return np.asarray(self.weights, dtype=float)
+
+    def _numeric_columns(self) -> list:
+        """Positions of the columns with numpy numeric or bool dtypes, other
+        than the weight column, which isn't weighted."""
+        weights_col = getattr(self, "weights_col", None)
+        return [
+            i
+            for i, (column, dtype) in enumerate(self.dtypes.items())
+            if isinstance(dtype, np.dtype)
+            and dtype.kind in "biuf"
+            and column != weights_col
+        ]
+
+    def _numeric_block(self, numeric: list) -> np.array:
+        """Float array with a row for each of the given numeric columns. May
+        be a view of the frame's values, so must not be written to."""
+        if len(numeric) == len(self.columns):
+            # A view of the values if they're all in one float block.
+            return self.to_numpy(dtype=float).T
+        # Columns are stored contiguously, so stacking them as rows is a
+        # plain copy.
+        return np.stack([self._get_column_array(i) for i in numeric]).astype(
+            float, copy=False
+        )
+
+    def _linear_function(self, name: str) -> pd.Series:
+        """Calculates a weighted sum, count or mean of every column. Numeric
+        columns are reduced together with one matrix-vector product; other
+        columns fall back to their MicroSeries.
+
+        :param name: One of LINEAR_FUNCTIONS.
+        :type name: str
+        :returns: Series with the result for each column.
+        :rtype: pd.Series
+        """
+        weights = self._weight_array()
+        numeric = self._numeric_columns()
+        results = np.empty(len(self.columns))
+        if name == "count":
+            results[numeric] = weights.sum()
+        elif len(numeric) > 0:
+            values = self._numeric_block(numeric)
+            if name == "sum":
+                # Skip missing products, as pd.Series.sum does.
+                weights = np.where(np.isnan(weights), 0, weights)
+                missing = np.isnan(values)
+                if missing.any():
+                    values = np.where(missing, 0, values)
+            results[numeric] = values @ weights
+            if name == "mean":
+                results[numeric] /= weights.sum()
+        results = pd.Series(results, index=self.columns)
+        for i in np.setdiff1d(np.arange(len(self.columns)), numeric):
+            results.iloc[i] = getattr(self[self.columns[i]], name)()
+        return results
+
+    def _quantile(
+        self, q: np.array, n_threads: int = 1
+    ) -> Union[pd.Series, pd.DataFrame]:
+        """Calculates weighted quantiles of every column. Numeric columns
+        are sorted and interpolated together; other columns fall back to
+        their MicroSeries.
+
+        :param q: Quantile or array of quantiles to calculate.
+        :type q: np.array
+        :param n_threads: Number of threads to sort the columns with,
+            defaults to 1.
+        :type n_threads: int
+        :returns: Series of each column's quantile for a single quantile,
+            otherwise a DataFrame with a row for each column and a column
+            for each quantile.
+        :rtype: Union[pd.Series, pd.DataFrame]
+        """
+        quantiles = np.array(q, dtype=float)
+        assert np.all(quantiles >= 0) and np.all(
+            quantiles <= 1
+        ), "quantiles should be in [0, 1]"
+        numeric = self._numeric_columns()
+        results = np.empty((len(self.columns), quantiles.size))
+        if len(numeric) > 0:
+            results[numeric] = _column_quantiles(
+                self._numeric_block(numeric),
+                self._weight_array(),
+                quantiles.ravel(),
+                n_threads,
+            )
+        for i in np.setdiff1d(np.arange(len(self.columns)), numeric):
+            results[i] = self[self.columns[i]].quantile(quantiles.ravel())
+        if quantiles.shape == ():
+            return pd.Series(results[:, 0], index=self.columns)
+        return pd.DataFrame(results, index=self.columns, columns=quantiles)
 
     def get_args_as_micro_series(*kwarg_names: tuple) -> Callable:
         """Decorator for auto-parsing column names into MicroSeries objects.
@@ -578,22 +1629,36 @@ class MicroDataFrame(pd.DataFrame):
 
         return arg_series_decorator
 
-    def __setitem__(self, *args, **kwargs):
-        super().__setitem__(*args, **kwargs)
-        self._link_all_weights()
-
-    def _link_weights(self, column):
-        # self[column] = ... triggers __setitem__, which forces pd.Series
-        # this workaround avoids that
-        self[column].__class__ = MicroSeries
-        self[column].set_weights(self.weights)
+    def _box_col_values(self, values, loc: int) -> pd.Series:
+        # pandas builds every column Series it hands out here, so columns
+        # are weighted on access instead of relinked on every assignment.
+        column = super()._box_col_values(values, loc)
+        if self._shares_values(column._values):
+            # A view, so this leaves the frame's own values writeable.
+            column._values.flags.writeable = False
+        # The weight column is left unweighted.
+        if column.name == getattr(self, "weights_col", None):
+            return column
+        column.__class__ = MicroSeries
+        column.set_weights(getattr(self, "weights", None))
+        return column
+
+    def _clear_item_cache(self) -> None:
+        # pandas drops the columns it has handed out when it changes values
+        # in place, but they may still share those values.
+        for column in self._item_cache.values():
+            if isinstance(column, MicroSeries):
+                column._clear_sort_cache()
+        super()._clear_item_cache()
 
     def _link_all_weights(self):
         if self.weights is None:
             self.set_weights(np.ones((len(self))))
-        for column in self.columns:
-            if column != self.weights_col:
-                self._link_weights(column)
+        # Columns built from now on get the new weights; only those pandas
+        # has already built and cached need updating.
+        for column in self._item_cache.values():
+            if isinstance(column, MicroSeries):
+                column.set_weights(self.weights)
 
     def set_weights(self, weights) -> None:
         """Sets the weights for the MicroDataFrame. If a string is received,
@@ -602,16 +1667,33 @@ class MicroDataFrame(pd.DataFrame):
         :param weights: Array of weights.
         :type weights: np.array
         """
-        if isinstance(weights, str):
-            self.weights_col = weights
-            self.weights = pd.Series(self[weights], dtype=float)
+        weights_col = weights if isinstance(weights, str) else None
+        if weights is not None and weights_col != getattr(
+            self, "weights_col", None
+        ):
+            # Rebuild the columns, so only the weight column is unweighted.
+            self.weights_col = weights_col
+            self._clear_item_cache()
+        if weights_col is not None:
+            self._weights = _shared_weights(
+                self[weights], self._clear_item_cache
+            )
+            self._link_all_weights()
         elif weights is not None:
-            self.weights_col = None
-            with warnings.catch_warnings():
-                warnings.filterwarnings("ignore", category=UserWarning)
-                self.weights = pd.Series(weights, dtype=float)
+            self._weights = _shared_weights(weights, self._clear_item_cache)
             self._link_all_weights()
 
+    @property
+    def weights(self) -> pd.Series:
+        """Weights of the rows, shared with the columns and with copies.
+        Writing to them in place copies them first, and assigning,
+        including through in-place operators, replaces them."""
+        return self._weights
+
+    @weights.setter
+    def weights(self, weights: np.array) -> None:
+        self.set_weights(weights)
+
     def set_weight_col(self, column: str) -> None:
         """Sets the weights for the MicroDataFrame by specifying the name of
         the weight column.
@@ -633,56 +1715,194 @@ class MicroDataFrame(pd.DataFrame):
             return MicroDataFrame(result, weights=weights)
         return result
 
-    def catch_series_relapse(self):
-        for col in self.columns:
-            if self[col].__class__ == pd.Series:
-                self._link_weights(col)
-
-    def __setattr__(self, key, value):
-        super().__setattr__(key, value)
-        self.catch_series_relapse()
-
     def reset_index(self):
         res = super().reset_index()
         res = MicroDataFrame(res, weights=self.weights)
         return res
 
-    def copy(self, deep=True):
-        res = super().copy(deep)
-        # This changes the original columns to Series. Undo it:
-        for col in self.columns:
-            self[col] = MicroSeries(self[col])
-        res = MicroDataFrame(res, weights=self.weights.copy(deep))
-        return res
+    def copy(
+        self, deep: bool = True, copy_on_write: bool = False
+    ) -> "MicroDataFrame":
+        """Copies the MicroDataFrame, leaving the source untouched. The
+        weights are read-only, so the copy shares them.
+
+        :param deep: Whether to copy the values, defaults to True. If False,
+            the copy shares the source's values, as in pd.DataFrame.copy.
+        :type deep: bool
+        :param copy_on_write: Whether to share the columns read-only rather
+            than copy them, defaults to False. Assigning a column of either
+            frame, including through in-place operators, replaces it in that
+            frame alone, so untouched columns are never duplicated. Writing
+            through .loc, .iloc, .at, .iat, update or inplace=True methods
+            first copies that frame's shared values. Column Series handed
+            out by either frame are read-only while shared, so writing into
+            them directly raises a ValueError. The source's own arrays stay
+            writeable, so writing to them without pandas, e.g. through
+            to_numpy(), also changes the copy.
+        :type copy_on_write: bool
+        :returns: Copy of the MicroDataFrame.
+        :rtype: MicroDataFrame
+        """
+        if not copy_on_write or len(self.columns) == 0:
+            return MicroDataFrame(super().copy(deep), weights=self.weights)
+        self._shared_values = list(self._shared_values) + [
+            values
+            for values in self._mgr.arrays
+            if isinstance(values, np.ndarray)
+        ]
+        # Columns pandas has already handed out are views of the values.
+        for column in self._item_cache.values():
+            if isinstance(column._values, np.ndarray):
+                column._values.flags.writeable = False
+        columns = []
+        for i, name in enumerate(self.columns):
+            values = self._get_column_array(i)
+            if isinstance(values, np.ndarray):
+                values = values.view()
+                values.flags.writeable = False
+            else:
+                values = values.copy()
+            columns.append(
+                pd.Series(values, index=self.index, name=name, copy=False)
+            )
+        # Concatenating without copying keeps a block per column, so
+        # replacing one leaves the others shared.
+        res = pd.concat(columns, axis=1, copy=False)
+        return MicroDataFrame(res, weights=self.weights)
+
+    def _shares_values(self, values) -> bool:
+        """Whether values may be shared with a copy-on-write copy."""
+        return isinstance(values, np.ndarray) and (
+            not values.flags.writeable
+            or any(
+                np.may_share_memory(values, shared)
+                for shared in self._shared_values
+            )
+        )
+
+    def _copy_shared_values(self) -> None:
+        """Replaces values shared by copy(copy_on_write=True) with copies,
+        before pandas writes to them in place.
+        """
+        if not any(self._shares_values(values) for values in self._mgr.arrays):
+            return
+        self._mgr = self._mgr.apply(
+            lambda values: values.copy()
+            if self._shares_values(values)
+            else values
+        )
+        self._shared_values = ()
+        self._clear_item_cache()
+
+    def __setitem__(self, key, value) -> None:
+        # Setting through a boolean frame writes in place.
+        if isinstance(key, pd.DataFrame) or np.ndim(key) == 2:
+            self._copy_shared_values()
+        super().__setitem__(key, value)
+
+    @property
+    def loc(self) -> _CopyOnWriteLocIndexer:
+        return _CopyOnWriteLocIndexer("loc", self)
+
+    @property
+    def iloc(self) -> _CopyOnWriteILocIndexer:
+        return _CopyOnWriteILocIndexer("iloc", self)
+
+    @property
+    def at(self) -> _CopyOnWriteAtIndexer:
+        return _CopyOnWriteAtIndexer("at", self)
+
+    @property
+    def iat(self) -> _CopyOnWriteIAtIndexer:
+        return _CopyOnWriteIAtIndexer("iat", self)
+
+    def update(self, other, *args, **kwargs) -> None:
+        self._copy_shared_values()
+        super().update(other, *args, **kwargs)
 
     def equals(self, other) -> bool:
         equal_values = super().equals(other)
         equal_weights = self.weights.equals(other.weights)
         return equal_values and equal_weights
 
-    @get_args_as_micro_series()
-    def groupby(self, by: Union[str, list], *args, **kwargs):
+    def _to_arrow(self):
+        """Converts to a pyarrow Table, recording the weights in its schema
+        metadata. Weights that aren't a column are stored in a column named
+        WEIGHTS_COLUMN.
+        """
+        pa = import_optional_dependency(
+            "pyarrow", extra="Writing Arrow files requires pyarrow."
+        )
+        table = pa.Table.from_pandas(pd.DataFrame(self, copy=False))
+        weights = getattr(self, "weights_col", None)
+        hidden = weights is None and self.weights is not None
+        if hidden:
+            weights = WEIGHTS_COLUMN
+            table = table.append_column(
+                weights, pa.array(self.weights.values)
+            )
+        metadata = dict(table.schema.metadata or {})
+        metadata[WEIGHTS_METADATA_KEY] = json.dumps(
+            {"weights": weights, "hidden": hidden}
+        ).encode()
+        return table.replace_schema_metadata(metadata)
+
+    def to_parquet(self, path: str, **kwargs) -> None:
+        """Writes the MicroDataFrame to a Parquet file, keeping the weights
+        in the file's schema metadata for microdf.read_parquet. Requires
+        pyarrow.
+
+        :param path: Path of the file.
+        :type path: str
+        :param **kwargs: Arguments passed to pyarrow.parquet.write_table,
+            e.g. row_group_size, which sets the granularity of filtered
+            reads.
+        """
+        import_optional_dependency(
+            "pyarrow", extra="Writing Parquet files requires pyarrow."
+        )
+        import pyarrow.parquet as pq
+
+        pq.write_table(self._to_arrow(), path, **kwargs)
+
+    def to_feather(self, path: str, **kwargs) -> None:
+        """Writes the MicroDataFrame to a Feather file, keeping the weights
+        in the file's schema metadata for microdf.read_feather. Requires
+        pyarrow.
+
+        :param path: Path of the file.
+        :type path: str
+        :param **kwargs: Arguments passed to pyarrow.feather.write_feather,
+            e.g. compression="uncompressed", which lets memory-mapped reads
+            avoid copying.
+        """
+        import_optional_dependency(
+            "pyarrow", extra="Writing Feather files requires pyarrow."
+        )
+        import pyarrow.feather as feather
+
+        feather.write_feather(self._to_arrow(), path, **kwargs)
+
+    def groupby(self, by: Union[str, list, GroupIndex], *args, **kwargs):
         """
         Returns a GroupBy object with MicroSeriesGroupBy objects for
         each column
 
-        :param by: column to group by
-        :type by: Union[str, list]
+        :param by: column to group by, or a GroupIndex of the rows
+        :type by: Union[str, list, GroupIndex]
 
         return: DataFrameGroupBy object with columns using weights
         rtype: DataFrameGroupBy
         """
-        self["__tmp_weights"] = self.weights
-        gb = super().groupby(by, *args, **kwargs)
-        weights = copy.deepcopy(gb["__tmp_weights"])
-        for col in self.columns:  # df.groupby(...)[col]s use weights
-            res = gb[col]
-            res.__class__ = MicroSeriesGroupBy
-            res._init()
-            res.weights = weights
-            setattr(gb, col, res)
+        group_index = None
+        keys = by
+        if isinstance(by, GroupIndex):
+            group_index = by
+            group_index.check_length(len(self))
+            keys = group_index.keys
+        gb = super().groupby(keys, *args, **kwargs)
         gb.__class__ = MicroDataFrameGroupBy
-        gb._init(by)
+        gb._init(by, self.weights.values, group_index)
         return gb
 
     @get_args_as_micro_series()
@@ -789,3 +2009,68 @@ class MicroDataFrame(pd.DataFrame):
         df = pd.DataFrame(self)
         df["weight"] = self.weights
         return df[[df.columns[-1]] + list(df.columns[:-1])].__repr__()
+
+
+def _frame_function(name: str) -> Callable:
+    """Builds a MicroDataFrame method that applies a weighted function to
+    each column.
+
+    :param name: Name of the MicroSeries method.
+    :type name: str
+    """
+    fn = getattr(MicroSeries, name)
+
+    @wraps(fn)
+    def frame_fn(self, *args, **kwargs):
+        # The weighted functions take no arguments, so any are left to
+        # the columns' own methods to reject.
+        if name in MicroDataFrame.LINEAR_FUNCTIONS and not (args or kwargs):
+            return self._linear_function(name)
+        if name == "quantile":
+            return self._quantile(*args, **kwargs)
+        is_array = len(args) > 0 and hasattr(args[0], "__len__")
+        if (
+            name in MicroSeries.SCALAR_FUNCTIONS
+            or name in MicroSeries.AGNOSTIC_FUNCTIONS
+            and not is_array
+        ):
+            results = pd.Series(
+                [
+                    getattr(self[col], name)(*args, **kwargs)
+                    for col in self.columns
+                ]
+            )
+            results.index = self.columns
+            return results
+        elif (
+            name in MicroSeries.VECTOR_FUNCTIONS
+            or name in MicroSeries.AGNOSTIC_FUNCTIONS
+            and is_array
+        ):
+            results = pd.DataFrame(
+                [
+                    getattr(self[col], name)(*args, **kwargs)
+                    for col in self.columns
+                ]
+            )
+            results.index = self.columns
+            return results
+
+    return frame_fn
+
+
+for _name in MicroSeries.FUNCTIONS:
+    setattr(MicroDataFrame, _name, _frame_function(_name))
+
+
+for _name in dir(pd.DataFrame):
+    if (
+        not _name.startswith("_")
+        and _name not in MicroDataFrame.__dict__
+        and _takes_inplace(getattr(pd.DataFrame, _name))
+    ):
+        setattr(
+            MicroDataFrame,
+            _name,
+            _copy_before_inplace(pd.DataFrame, _name),
+        )
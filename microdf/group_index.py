@@ -0,0 +1,385 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+
+def _codes_from_groupby(gb) -> np.array:
+    # Rows in dropped (NaN) groups have a missing group number.
+    codes = gb.ngroup().to_numpy(dtype=float)
+    return np.nan_to_num(codes, nan=-1).astype(np.intp)
+
+
+def _is_column(df, key) -> bool:
+    return (
+        isinstance(df, pd.DataFrame)
+        and pd.api.types.is_hashable(key)
+        and key in df.columns
+    )
+
+
+def interpolate_quantiles(
+    sorted_values: np.array,
+    positions: np.array,
+    counts: np.array,
+    below: np.array,
+    quantiles: np.array,
+) -> np.array:
+    """Interpolates quantiles within each segment of an array sorted by
+    segment and then by value, as np.interp would for each segment alone.
+
+    :param sorted_values: Values sorted by segment, then by value.
+    :type sorted_values: np.array
+    :param positions: Quantile position of each value in its segment.
+    :type positions: np.array
+    :param counts: Number of values in each segment.
+    :type counts: np.array
+    :param below: Array with a row for each segment and a column for each
+        quantile, counting the segment's positions at or below it.
+    :type below: np.array
+    :param quantiles: Array of quantiles to calculate.
+    :type quantiles: np.array
+    :returns: Array with a row for each segment and a column for each
+        quantile. Empty segments are NaN.
+    :rtype: np.array
+    """
+    # Position of the last value at or below each quantile, clipped to the
+    # segment, as np.interp does beyond the end points.
+    starts = (np.cumsum(counts) - counts)[:, None]
+    ends = starts + counts[:, None] - 1
+    lower = np.clip(starts + below - 1, starts, ends)
+    upper = np.clip(starts + below, starts, ends)
+    q = np.broadcast_to(quantiles, lower.shape)
+    interior = lower != upper
+    result = sorted_values[np.minimum(lower, len(sorted_values) - 1)].astype(
+        float
+    )
+    lo, hi = lower[interior], upper[interior]
+    slope = (sorted_values[hi] - sorted_values[lo]) / (
+        positions[hi] - positions[lo]
+    )
+    result[interior] = (
+        slope * (q[interior] - positions[lo]) + sorted_values[lo]
+    )
+    result[counts == 0] = np.nan
+    return result
+
+
+class GroupIndex:
+    def __init__(self, df, by, sort: bool = True, dropna: bool = True):
+        """Group codes, sort order and segment boundaries for a grouping,
+        computed once and reused by every weighted aggregation over it.
+        Weighted functions and MicroSeries/MicroDataFrame groupby accept a
+        GroupIndex in place of the columns to group by.
+
+        :param df: DataFrame or Series to group.
+        :type df: Union[pd.DataFrame, pd.Series]
+        :param by: Column, list of columns or arrays to group by, as in
+            pd.DataFrame.groupby.
+        :param sort: Whether to sort the groups, defaults to True.
+        :type sort: bool
+        :param dropna: Whether to drop rows with missing keys, defaults to
+            True.
+        :type dropna: bool
+        """
+        gb = df.groupby(by, sort=sort, dropna=dropna)
+        self._set_codes(_codes_from_groupby(gb), gb.size().index)
+        self.by = by
+        self._keys = [
+            np.asarray(df[key]) if _is_column(df, key) else np.asarray(key)
+            for key in (by if isinstance(by, list) else [by])
+        ]
+
+    def _set_codes(self, codes: np.array, groups: pd.Index) -> None:
+        self.codes = np.asarray(codes, dtype=np.intp)
+        self.groups = groups
+        self.ngroups = len(groups)
+
+    @classmethod
+    def from_codes(cls, codes: np.array, groups: pd.Index) -> "GroupIndex":
+        """Builds a GroupIndex from precomputed group codes.
+
+        :param codes: Integer group code of each row, indexing into groups.
+            Rows with a negative code belong to no group.
+        :type codes: np.array
+        :param groups: Index of group labels.
+        :type groups: pd.Index
+        :returns: GroupIndex over the codes.
+        :rtype: GroupIndex
+        """
+        group_index = cls.__new__(cls)
+        group_index._set_codes(codes, groups)
+        group_index.by = None
+        group_index._keys = None
+        return group_index
+
+    @classmethod
+    def from_groupby(cls, gb) -> "GroupIndex":
+        """Builds a GroupIndex from a pandas GroupBy object.
+
+        :param gb: pandas SeriesGroupBy or DataFrameGroupBy.
+        :returns: GroupIndex with the same groups, in the same order.
+        :rtype: GroupIndex
+        """
+        return cls.from_codes(_codes_from_groupby(gb), gb.size().index)
+
+    @property
+    def keys(self) -> list:
+        """Group keys as positional arrays, for building pandas groupbys over
+        other objects with the same rows."""
+        if self._keys is None:
+            # Negative codes become missing, so pandas drops those rows too.
+            self._keys = [
+                pd.Categorical.from_codes(
+                    self.codes, categories=self.groups.to_flat_index()
+                )
+            ]
+        return self._keys
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def check_length(self, n: int) -> None:
+        """Raises a ValueError unless the GroupIndex has n rows.
+
+        :param n: Expected number of rows.
+        :type n: int
+        """
+        if len(self) != n:
+            raise ValueError(
+                f"GroupIndex has {len(self)} rows but the data has {n}."
+            )
+
+    @cached_property
+    def n_excluded(self) -> int:
+        """Number of rows that belong to no group."""
+        return int(np.sum(self.codes < 0))
+
+    @cached_property
+    def valid_codes(self) -> np.array:
+        if self.n_excluded == 0:
+            return self.codes
+        return self.codes[self.codes >= 0]
+
+    @cached_property
+    def counts(self) -> np.array:
+        """Number of rows in each group."""
+        return np.bincount(self.valid_codes, minlength=self.ngroups)
+
+    @cached_property
+    def starts(self) -> np.array:
+        """Position of the first row of each group once sorted by group."""
+        return np.cumsum(self.counts) - self.counts
+
+    @cached_property
+    def order(self) -> np.array:
+        """Row positions sorted by group, keeping the original order within
+        each group."""
+        return np.argsort(self.codes, kind="stable")[self.n_excluded:]
+
+    @cached_property
+    def sorted_codes(self) -> np.array:
+        return np.repeat(np.arange(self.ngroups), self.counts)
+
+    def _valid(self, x: np.array) -> np.array:
+        if self.n_excluded == 0:
+            return x
+        return x[self.codes >= 0]
+
+    def sum(self, x: np.array) -> np.array:
+        """Sums an array within each group.
+
+        :param x: Array with one value per row.
+        :type x: np.array
+        :returns: Array with the sum of each group.
+        :rtype: np.array
+        """
+        return np.bincount(
+            self.valid_codes, weights=self._valid(x), minlength=self.ngroups
+        )
+
+    def sort(self, values: np.array) -> np.array:
+        """Sorts rows by group, then by value within each group. The sort is
+        stable, so tied values keep their original order.
+
+        :param values: Array with one value per row.
+        :type values: np.array
+        :returns: Row positions in sorted order.
+        :rtype: np.array
+        """
+        order = np.argsort(values, kind="stable")
+        codes = self.codes[order]
+        if self.ngroups < np.iinfo(np.int16).max:
+            # numpy radix sorts 16-bit integers, which beats a lexsort.
+            codes = codes.astype(np.int16)
+        # Excluded rows have negative codes, so they sort first.
+        return order[np.argsort(codes, kind="stable")][self.n_excluded:]
+
+    def cumsum(self, x: np.array) -> np.array:
+        """Cumulative sums within each group of an array already sorted by
+        group.
+
+        :param x: Array sorted by group.
+        :type x: np.array
+        :returns: Cumulative sums, restarting at each group.
+        :rtype: np.array
+        """
+        # Subtracting group offsets from one running total would lose
+        # precision in small groups late in the array, so accumulate each
+        # group separately. Categorical codes avoid refactorising.
+        groups = pd.Categorical.from_codes(
+            self.sorted_codes, categories=np.arange(self.ngroups)
+        )
+        return (
+            pd.Series(x)
+            .groupby(groups, observed=True, sort=False)
+            .cumsum()
+            .values
+        )
+
+    def quantile(
+        self, values: np.array, weights: np.array, quantiles: np.array
+    ) -> np.array:
+        """Calculates weighted quantiles of every group at once, using the
+        same interpolation as weighted_quantile.
+
+        :param values: Array with one value per row.
+        :type values: np.array
+        :param weights: Array with one weight per row.
+        :type weights: np.array
+        :param quantiles: Array of quantiles to calculate.
+        :type quantiles: np.array
+        :returns: Array with a row for each group and a column for each
+            quantile. Empty groups are NaN.
+        :rtype: np.array
+        """
+        quantiles = np.asarray(quantiles, dtype=float).ravel()
+        order = self.sort(values)
+        sorted_values = values[order]
+        sorted_weights = weights[order]
+        totals = np.repeat(self.sum(weights), self.counts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            positions = (
+                self.cumsum(sorted_weights) - 0.5 * sorted_weights
+            ) / totals
+        # For each group and quantile, count the positions at or below the
+        # quantile. Bucketing positions by the number of quantiles below
+        # them gives all counts from one histogram.
+        quantile_order = np.argsort(quantiles)
+        sorted_quantiles = quantiles[quantile_order]
+        n_quantiles = len(quantiles)
+        buckets = np.searchsorted(sorted_quantiles, positions, side="left")
+        histogram = np.bincount(
+            self.sorted_codes * (n_quantiles + 1) + buckets,
+            minlength=self.ngroups * (n_quantiles + 1),
+        ).reshape(self.ngroups, n_quantiles + 1)
+        below = np.cumsum(histogram, axis=1)[:, :n_quantiles]
+        result = interpolate_quantiles(
+            sorted_values, positions, self.counts, below, sorted_quantiles
+        )
+        return result[:, np.argsort(quantile_order)]
+
+    def stacked_index(self) -> pd.MultiIndex:
+        """Index for one value per row, ordered by group: the group labels
+        and each row's position within its group.
+
+        :returns: MultiIndex of group labels and positions.
+        :rtype: pd.MultiIndex
+        """
+        labels = self.groups.take(self.sorted_codes)
+        positions = np.arange(len(self.sorted_codes)) - np.repeat(
+            self.starts, self.counts
+        )
+        if isinstance(labels, pd.MultiIndex):
+            arrays = [
+                labels.get_level_values(i) for i in range(labels.nlevels)
+            ]
+        else:
+            arrays = [labels]
+        return pd.MultiIndex.from_arrays(
+            arrays + [positions], names=list(labels.names) + [None]
+        )
+
+    def gini(
+        self, values: np.array, weights: np.array, negatives: str = None
+    ) -> np.array:
+        """Calculates the Gini index of every group at once.
+
+        :param values: Array with one value per row.
+        :type values: np.array
+        :param weights: Array with one weight per row.
+        :type weights: np.array
+        :param negatives: How to treat negative values, as in gini.
+        :type negatives: str
+        :returns: Array with the Gini index of each group.
+        :rtype: np.array
+        """
+        order = self.sort(values)
+        sorted_x = values[order].astype(float)
+        sorted_w = weights[order]
+        if negatives == "zero":
+            sorted_x[sorted_x < 0] = 0
+        if negatives == "shift":
+            # Values are sorted within groups, so each group starts with its
+            # minimum.
+            minimums = np.minimum(sorted_x[self.starts[self.counts > 0]], 0)
+            sorted_x -= np.repeat(minimums, self.counts[self.counts > 0])
+        cumw = self.cumsum(sorted_w)
+        cumxw = self.cumsum(sorted_x * sorted_w)
+        # Sum the terms of consecutive rows in the same group.
+        same_group = self.sorted_codes[1:] == self.sorted_codes[:-1]
+        terms = cumxw[1:] * cumw[:-1] - cumxw[:-1] * cumw[1:]
+        numerators = np.bincount(
+            self.sorted_codes[1:][same_group],
+            weights=terms[same_group],
+            minlength=self.ngroups,
+        )
+        ends = self.starts + self.counts - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ginis = numerators / (cumxw[ends] * cumw[ends])
+        ginis[self.counts == 0] = np.nan
+        return ginis
+
+    def top_x_pct_shares(
+        self, values: np.array, weights: np.array, top_x_pcts: np.array
+    ) -> np.array:
+        """Calculates top x% shares of every group at once.
+
+        :param values: Array with one value per row.
+        :type values: np.array
+        :param weights: Array with one weight per row.
+        :type weights: np.array
+        :param top_x_pcts: Decimals between 0 and 1 of the top %.
+        :type top_x_pcts: np.array
+        :returns: Array with a row for each group and a column for each
+            top x%.
+        :rtype: np.array
+        """
+        top_x_pcts = np.asarray(top_x_pcts, dtype=float).ravel()
+        thresholds = self.quantile(values, weights, 1 - top_x_pcts)
+        weighted = values * weights
+        # Missing values count as zero, as in weighted_sum.
+        weighted[np.isnan(weighted)] = 0
+        totals = self.sum(weighted)
+        shares = np.empty((self.ngroups, len(top_x_pcts)))
+        for i in range(len(top_x_pcts)):
+            in_top = values >= np.append(thresholds[:, i], np.nan)[self.codes]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                shares[:, i] = self.sum(weighted * in_top) / totals
+        return shares
+
+
+def as_group_index(df, by) -> GroupIndex:
+    """Returns by if it is already a GroupIndex over df's rows, otherwise
+    builds one.
+
+    :param df: DataFrame or Series to group.
+    :type df: Union[pd.DataFrame, pd.Series]
+    :param by: GroupIndex, or column, list of columns or arrays to group by.
+    :returns: GroupIndex over df's rows.
+    :rtype: GroupIndex
+    """
+    if isinstance(by, GroupIndex):
+        by.check_length(len(df))
+        return by
+    return GroupIndex(df, by)
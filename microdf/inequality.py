@@ -1,6 +1,8 @@
 import numpy as np
+import pandas as pd
 
 import microdf as mdf
+from microdf.group_index import as_group_index
 
 
 def gini(df, col, w=None, negatives=None, groupby=None):
@@ -16,7 +18,8 @@ def gini(df, col, w=None, negatives=None, groupby=None):
         when this minimum is negative. That is, it adds the absolute
         minimum value.
         Defaults to None, which leaves negative values as they are.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: A float, the Gini index.
 
     """
@@ -47,7 +50,48 @@ def gini(df, col, w=None, negatives=None, groupby=None):
 
     if groupby is None:
         return _gini(df, col, w, negatives)
-    return df.groupby(groupby).apply(lambda x: _gini(x, col, w, negatives))
+    group_index, values, weights = _grouped_arrays(df, col, w, groupby)
+    ginis = group_index.gini(values, weights, negatives)
+    return pd.Series(ginis, index=group_index.groups)
+
+
+def _grouped_arrays(df, col, w, groupby):
+    """Returns the GroupIndex of a grouping, with the values and weights as
+    float arrays.
+
+    :param df: DataFrame.
+    :param col: Name of column in df representing value.
+    :param w: Column representing weight in df.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
+    :returns: Tuple of GroupIndex, values and weights.
+
+    """
+    group_index = as_group_index(df, groupby)
+    values = np.array(df[col], dtype=float)
+    if w is None:
+        weights = np.ones(len(values))
+    else:
+        weights = np.array(df[w], dtype=float)
+    return group_index, values, weights
+
+
+def _top_x_pct_shares(df, col, top_x_pcts, w=None, groupby=None):
+    """Calculates several top x% shares by group from one sort.
+
+    :param df: DataFrame.
+    :param col: Name of column in df representing value.
+    :param top_x_pcts: List of decimals between 0 and 1 of the top %.
+    :param w: Column representing weight in df.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
+    :returns: DataFrame with a row for each group and a column for each
+        top x%.
+
+    """
+    group_index, values, weights = _grouped_arrays(df, col, w, groupby)
+    shares = group_index.top_x_pct_shares(values, weights, top_x_pcts)
+    return pd.DataFrame(shares, index=group_index.groups, columns=top_x_pcts)
 
 
 def top_x_pct_share(df, col, top_x_pct, w=None, groupby=None):
@@ -57,7 +101,8 @@ def top_x_pct_share(df, col, top_x_pct, w=None, groupby=None):
     :param col: Name of column in df representing value.
     :param top_x_pct: Decimal between 0 and 1 of the top %, e.g. 0.1, 0.001.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top x%.
 
     """
@@ -70,9 +115,8 @@ def top_x_pct_share(df, col, top_x_pct, w=None, groupby=None):
 
     if groupby is None:
         return _top_x_pct_share(df, col, top_x_pct, w)
-    return df.groupby(groupby).apply(
-        lambda x: _top_x_pct_share(x, col, top_x_pct, w)
-    )
+    shares = _top_x_pct_shares(df, col, [top_x_pct], w, groupby)
+    return shares[top_x_pct].rename(None)
 
 
 def bottom_x_pct_share(df, col, bottom_x_pct, w=None, groupby=None):
@@ -82,7 +126,8 @@ def bottom_x_pct_share(df, col, bottom_x_pct, w=None, groupby=None):
     :param col: Name of column in df representing value.
     :param bottom_x_pct: Decimal between 0 and 1 of the top %, e.g. 0.1, 0.001.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the bottom x%.
 
     """
@@ -95,7 +140,8 @@ def bottom_50_pct_share(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the bottom 50%.
 
     """
@@ -108,7 +154,8 @@ def top_50_pct_share(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top 50%.
 
     """
@@ -121,7 +168,8 @@ def top_10_pct_share(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top 10%.
 
     """
@@ -134,7 +182,8 @@ def top_1_pct_share(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top 1%.
 
     """
@@ -147,7 +196,8 @@ def top_0_1_pct_share(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top 0.1%.
 
     """
@@ -160,11 +210,15 @@ def t10_b50(df, col, w=None, groupby=None):
     :param df: DataFrame.
     :param col: Name of column in df representing value.
     :param w: Column representing weight in df.
-    :param groupby: Column, or list of columns, to group by.
+    :param groupby: Column, or list of columns, to group by, or a
+        GroupIndex of df.
     :returns: The share of w-weighted val held by the top 10% divided by
         the share of w-weighted val held by the bottom 50%.
 
     """
-    t10 = top_10_pct_share(df, col, w, groupby)
-    b50 = bottom_50_pct_share(df, col, w, groupby)
-    return t10 / b50
+    if groupby is None:
+        t10 = top_10_pct_share(df, col, w)
+        b50 = bottom_50_pct_share(df, col, w)
+        return t10 / b50
+    shares = _top_x_pct_shares(df, col, [0.1, 0.5], w, groupby)
+    return shares[0.1] / (1 - shares[0.5])
@@ -1,8 +1,15 @@
 import io
+import json
 import zipfile
+from pathlib import Path
+from typing import Iterator
 import requests
+import numpy as np
 import pandas as pd
 
+from microdf._optional import import_optional_dependency
+from microdf.generic import MicroDataFrame, WEIGHTS_METADATA_KEY
+
 HEADER = {
     "User-Agent":
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) " +
@@ -30,3 +37,244 @@ def read_stata_zip(url: str, **kwargs) -> pd.DataFrame:
     with zipfile.ZipFile(data) as archive:
         with archive.open(archive.namelist()[0]) as stata:
             return pd.read_stata(stata, **kwargs)
+
+
+def read_chunks(
+    path: str,
+    weights: str = None,
+    columns: list = None,
+    chunksize: int = 100_000,
+    **kwargs,
+) -> Iterator[MicroDataFrame]:
+    """Reads a CSV or Parquet file in chunks, as MicroDataFrames, so files
+    larger than memory can be processed a chunk at a time. Every chunk has
+    the same columns and dtypes, and the row numbers continue from chunk to
+    chunk. Parquet files need pyarrow.
+
+    The chunks can only be iterated once. For several passes, e.g. for
+    ChunkedMicroSeries.exact_quantiles, call read_chunks for each.
+
+    :param path: Path of a .csv file, optionally compressed, or a .parquet
+        or .pq file.
+    :type path: str
+    :param weights: Name of the weight column, defaults to unweighted.
+    :type weights: str
+    :param columns: Columns to read, defaults to all. The weight column is
+        read too.
+    :type columns: list
+    :param chunksize: Rows per chunk, defaults to 100,000.
+    :type chunksize: int
+    :param **kwargs: Arguments passed to pd.read_csv, e.g. dtype, which is
+        needed for integer columns with missing values after the first
+        chunk.
+    :returns: Iterator of MicroDataFrames.
+    :rtype: Iterator[MicroDataFrame]
+    """
+    if columns is not None and weights is not None and weights not in columns:
+        columns = list(columns) + [weights]
+    suffixes = [suffix.lower() for suffix in Path(path).suffixes]
+    if ".parquet" in suffixes or ".pq" in suffixes:
+        frames = _read_parquet_chunks(path, columns, chunksize)
+    elif ".csv" in suffixes:
+        frames = pd.read_csv(
+            path, usecols=columns, chunksize=chunksize, **kwargs
+        )
+    else:
+        raise ValueError(f"Can't tell the format of {path} from its name.")
+    dtypes = None
+    for frame in frames:
+        if dtypes is None:
+            dtypes = frame.dtypes
+        yield MicroDataFrame(_conform(frame, dtypes), weights=weights)
+
+
+def _read_parquet_chunks(
+    path: str, columns: list, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    import_optional_dependency(
+        "pyarrow", extra="Reading Parquet files requires pyarrow."
+    )
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    # Batches without missing values would otherwise read integer columns
+    # as integers, and others as floats.
+    dtypes = parquet_file.schema_arrow.empty_table().to_pandas().dtypes
+    if columns is not None:
+        dtypes = dtypes[columns]
+    metadata = parquet_file.metadata
+    for i, name in enumerate(parquet_file.schema_arrow.names):
+        if name in dtypes and dtypes[name].kind in "iu":
+            for group in range(metadata.num_row_groups):
+                statistics = metadata.row_group(group).column(i).statistics
+                if statistics is None or statistics.null_count:
+                    dtypes[name] = np.dtype(float)
+                    break
+    start = 0
+    for batch in parquet_file.iter_batches(
+        batch_size=chunksize, columns=columns
+    ):
+        frame = batch.to_pandas()
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        start += len(frame)
+        yield frame.astype(dtypes.to_dict())
+
+
+def _conform(frame: pd.DataFrame, dtypes: pd.Series) -> pd.DataFrame:
+    """Casts a chunk to the dtypes of the first chunk."""
+    differing = {
+        col: dtype
+        for col, dtype in dtypes.items()
+        if frame[col].dtype != dtype
+    }
+    if not differing:
+        return frame
+    try:
+        return frame.astype(differing)
+    except ValueError as e:
+        raise ValueError(
+            f"A chunk doesn't fit the dtypes of the first chunk ({e}). "
+            "Pass dtype to set them."
+        ) from e
+
+
+def read_parquet(
+    path: str,
+    columns: list = None,
+    filters: list = None,
+    memory_map: bool = False,
+) -> MicroDataFrame:
+    """Reads a Parquet file, such as one written by
+    MicroDataFrame.to_parquet, as a MicroDataFrame with its weights.
+    Only the columns asked for are read, and filters skip row groups
+    whose statistics rule them out. Requires pyarrow.
+
+    :param path: Path of the file.
+    :type path: str
+    :param columns: Columns to read, defaults to all. The weight column is
+        read too.
+    :type columns: list
+    :param filters: Row filters, as in pyarrow.parquet.read_table, e.g.
+        [("year", "=", 2020)].
+    :type filters: list
+    :param memory_map: Whether to memory-map the file, defaults to False.
+    :type memory_map: bool
+    :returns: MicroDataFrame, weighted if the file records weights.
+    :rtype: MicroDataFrame
+    """
+    import_optional_dependency(
+        "pyarrow", extra="Reading Parquet files requires pyarrow."
+    )
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(path, memory_map=memory_map)
+    weights, hidden = _weights_metadata(schema)
+    table = pq.read_table(
+        path,
+        columns=_with_weights(columns, weights),
+        filters=filters,
+        memory_map=memory_map,
+        use_pandas_metadata=True,
+    )
+    return _from_arrow(table, weights, hidden)
+
+
+def read_feather(
+    path: str,
+    columns: list = None,
+    filters: list = None,
+    memory_map: bool = True,
+) -> MicroDataFrame:
+    """Reads a Feather file, such as one written by
+    MicroDataFrame.to_feather, as a MicroDataFrame with its weights. Only
+    the columns asked for are read, and uncompressed files are
+    memory-mapped rather than copied. Requires pyarrow.
+
+    :param path: Path of the file.
+    :type path: str
+    :param columns: Columns to read, defaults to all. The weight column is
+        read too.
+    :type columns: list
+    :param filters: Row filters, in the format of
+        pyarrow.parquet.read_table, applied after reading.
+    :type filters: list
+    :param memory_map: Whether to memory-map the file, defaults to True.
+    :type memory_map: bool
+    :returns: MicroDataFrame, weighted if the file records weights.
+    :rtype: MicroDataFrame
+    """
+    pa = import_optional_dependency(
+        "pyarrow", extra="Reading Feather files requires pyarrow."
+    )
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    with pa.memory_map(str(path)) as source:
+        schema = pa.ipc.open_file(source).schema
+    weights, hidden = _weights_metadata(schema)
+    columns = _with_weights(columns, weights)
+    if columns is not None:
+        # Keep the stored index, as pyarrow.parquet.read_table does.
+        columns = columns + [
+            col for col in _index_columns(schema) if col not in columns
+        ]
+    if filters is None:
+        table = feather.read_table(
+            path, columns=columns, memory_map=memory_map
+        )
+        return _from_arrow(table, weights, hidden)
+    # Read the columns filtered on too, and drop them after filtering.
+    extra = []
+    if columns is not None:
+        extra = [col for col in _filter_columns(filters) if col not in columns]
+        columns = columns + extra
+    table = feather.read_table(path, columns=columns, memory_map=memory_map)
+    table = table.filter(pq.filters_to_expression(filters)).drop(extra)
+    return _from_arrow(table, weights, hidden)
+
+
+def _weights_metadata(schema) -> tuple:
+    """Returns the weight column recorded in an Arrow schema, if any, and
+    whether it holds weights that weren't a column.
+    """
+    metadata = (schema.metadata or {}).get(WEIGHTS_METADATA_KEY)
+    if metadata is None:
+        return None, False
+    metadata = json.loads(metadata)
+    return metadata["weights"], metadata["hidden"]
+
+
+def _index_columns(schema) -> list:
+    """Returns the columns holding the pandas index in an Arrow schema. A
+    RangeIndex is stored in the metadata instead, so has none.
+    """
+    metadata = schema.pandas_metadata or {}
+    index_columns = metadata.get("index_columns", [])
+    return [col for col in index_columns if isinstance(col, str)]
+
+
+def _filter_columns(filters: list) -> list:
+    """Returns the columns used in filters, which are either a list of
+    (column, op, value) conditions or a list of such lists.
+    """
+    if filters and isinstance(filters[0], tuple):
+        filters = [filters]
+    return list(dict.fromkeys(f[0] for conj in filters for f in conj))
+
+
+def _with_weights(columns: list, weights: str) -> list:
+    if columns is None:
+        return None
+    columns = list(columns)
+    if weights is None or weights in columns:
+        return columns
+    return columns + [weights]
+
+
+def _from_arrow(table, weights: str, hidden: bool) -> MicroDataFrame:
+    df = table.to_pandas()
+    if hidden:
+        return MicroDataFrame(
+            df.drop(columns=weights), weights=df[weights].values
+        )
+    return MicroDataFrame(df, weights=weights)
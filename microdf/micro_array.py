@@ -0,0 +1,297 @@
+from typing import Callable, Union
+import numpy as np
+import pandas as pd
+
+from microdf.generic import MicroSeries, WeightedECDF
+from microdf.selection import MAX_SELECTED_QUANTILES, select_quantiles
+
+
+def _read_only(x: np.ndarray) -> np.ndarray:
+    if not x.flags.writeable:
+        return x
+    # A view, so the caller's own array stays writeable.
+    view = x.view()
+    view.flags.writeable = False
+    return view
+
+
+def _binary_operator(op: Callable) -> Callable:
+    def operator_fn(self, other):
+        if isinstance(other, MicroArray):
+            other = other.values
+        return MicroArray(op(self.values, other), weights=self.weights)
+
+    return operator_fn
+
+
+def _unary_operator(op: Callable) -> Callable:
+    def operator_fn(self):
+        return MicroArray(op(self.values), weights=self.weights)
+
+    return operator_fn
+
+
+class MicroArray:
+    # Make numpy defer to MicroArray's reflected operators, e.g. in
+    # np.ndarray + MicroArray.
+    __array_ufunc__ = None
+
+    def __init__(
+        self,
+        values: Union[np.ndarray, MicroSeries],
+        weights: np.ndarray = None,
+    ):
+        """Weighted values without an index, for loops that never need
+        labels. Holds a values array and a weights array, and implements
+        the MicroSeries statistics and arithmetic on them directly. Both
+        arrays are read-only, and shared rather than copied by the results
+        of arithmetic.
+
+        :param values: Array of values, or a MicroSeries, whose weights are
+            used if weights isn't given. Neither is copied.
+        :type values: Union[np.ndarray, MicroSeries]
+        :param weights: Array of weights, defaults to ones.
+        :type weights: np.ndarray
+        """
+        if isinstance(values, MicroSeries) and weights is None:
+            weights = values.weights.values
+        self.values = _read_only(np.asarray(values))
+        if weights is None:
+            weights = np.ones(len(self.values))
+        self.weights = _read_only(np.asarray(weights, dtype=float))
+        self._sort_cache = None
+
+    def to_micro_series(self, index: pd.Index = None) -> MicroSeries:
+        """Converts to a MicroSeries without copying the values or
+        weights.
+
+        :param index: Index of the MicroSeries, defaults to a RangeIndex.
+        :type index: pd.Index
+        :returns: MicroSeries of the same values and weights.
+        :rtype: MicroSeries
+        """
+        return MicroSeries(
+            self.values, index=index, weights=self.weights, copy=False
+        )
+
+    def ecdf(self) -> WeightedECDF:
+        """Returns the weighted empirical distribution of the values.
+
+        :returns: Weighted ECDF of the values.
+        :rtype: WeightedECDF
+        """
+        return self._weighted_sort()
+
+    def _weighted_sort(self) -> WeightedECDF:
+        # The arrays are read-only, so the sort never goes stale.
+        if self._sort_cache is None:
+            self._sort_cache = WeightedECDF(self.values, self.weights)
+        return self._sort_cache
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __array__(self, dtype=None) -> np.ndarray:
+        return np.asarray(self.values, dtype=dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, MicroArray):
+            key = key.values
+        if np.isscalar(key):
+            return self.values[key]
+        return MicroArray(self.values[key], weights=self.weights[key])
+
+    def __repr__(self) -> str:
+        return f"MicroArray(values={self.values!r}, weights={self.weights!r})"
+
+    def weight(self) -> np.ndarray:
+        """Calculates the weighted value of each element.
+
+        :returns: Values multiplied by their weights.
+        :rtype: np.ndarray
+        """
+        return self.values * self.weights
+
+    def sum(self) -> float:
+        """Calculates the weighted sum, skipping missing values.
+
+        :returns: The weighted sum.
+        :rtype: float
+        """
+        return np.nansum(self.values * self.weights)
+
+    def count(self) -> float:
+        """Calculates the weighted count.
+
+        :returns: The weighted count.
+        :rtype: float
+        """
+        return self.weights.sum()
+
+    def mean(self) -> float:
+        """Calculates the weighted mean.
+
+        :returns: The weighted mean.
+        :rtype: float
+        """
+        return np.dot(self.values, self.weights) / self.weights.sum()
+
+    def quantile(self, q: np.ndarray) -> Union[float, np.ndarray]:
+        """Calculates weighted quantiles, as MicroSeries.quantile does.
+
+        :param q: Quantile or array of quantiles to calculate.
+        :type q: np.ndarray
+        :returns: Weighted quantile, or array of weighted quantiles.
+        :rtype: Union[float, np.ndarray]
+        """
+        quantiles = np.array(q)
+        assert np.all(quantiles >= 0) and np.all(
+            quantiles <= 1
+        ), "quantiles should be in [0, 1]"
+        if (
+            self._sort_cache is None
+            and quantiles.size <= MAX_SELECTED_QUANTILES
+        ):
+            return select_quantiles(self.values, self.weights, quantiles)
+        return self._weighted_sort().quantile(quantiles)
+
+    def median(self) -> float:
+        """Calculates the weighted median.
+
+        :returns: The weighted median.
+        :rtype: float
+        """
+        return self.quantile(0.5)
+
+    def gini(self, negatives: str = None) -> float:
+        """Calculates the Gini index.
+
+        :param negatives: How to treat negative values, as in
+            MicroSeries.gini.
+        :type negatives: str
+        :returns: Gini index.
+        :rtype: float
+        """
+        return self._weighted_sort().gini(negatives)
+
+    def top_x_pct_share(self, top_x_pct: float) -> float:
+        """Calculates top x% share.
+
+        :param top_x_pct: Decimal between 0 and 1 of the top %.
+        :type top_x_pct: float
+        :returns: The weighted share held by the top x%.
+        :rtype: float
+        """
+        return self._weighted_sort().top_x_pct_shares([top_x_pct])[0]
+
+    def bottom_x_pct_share(self, bottom_x_pct: float) -> float:
+        """Calculates bottom x% share.
+
+        :param bottom_x_pct: Decimal between 0 and 1 of the bottom %.
+        :type bottom_x_pct: float
+        :returns: The weighted share held by the bottom x%.
+        :rtype: float
+        """
+        return 1 - self.top_x_pct_share(1 - bottom_x_pct)
+
+    def bottom_50_pct_share(self) -> float:
+        return self.bottom_x_pct_share(0.5)
+
+    def top_50_pct_share(self) -> float:
+        return self.top_x_pct_share(0.5)
+
+    def top_10_pct_share(self) -> float:
+        return self.top_x_pct_share(0.1)
+
+    def top_1_pct_share(self) -> float:
+        return self.top_x_pct_share(0.01)
+
+    def top_0_1_pct_share(self) -> float:
+        return self.top_x_pct_share(0.001)
+
+    def t10_b50(self) -> float:
+        """Calculates ratio between the top 10% and bottom 50% shares.
+
+        :returns: The top 10% share divided by the bottom 50% share.
+        :rtype: float
+        """
+        t10, t50 = self._weighted_sort().top_x_pct_shares([0.1, 0.5])
+        return t10 / (1 - t50)
+
+    def cumsum(self) -> np.ndarray:
+        """Calculates the cumulative weighted sum, skipping missing values
+        as pd.Series.cumsum does.
+
+        :returns: Cumulative sums of the weighted values.
+        :rtype: np.ndarray
+        """
+        weighted = self.values * self.weights
+        result = np.nancumsum(weighted)
+        result[np.isnan(weighted)] = np.nan
+        return result
+
+    def rank(self, pct: bool = False) -> np.ndarray:
+        """Calculates weighted ranks, as MicroSeries.rank does.
+
+        :param pct: Whether to return ranks as a fraction of the total
+            weight, defaults to False.
+        :type pct: bool
+        :returns: Rank of each value.
+        :rtype: np.ndarray
+        """
+        ranks = self._weighted_sort().ranks()
+        if pct:
+            ranks = ranks / self.weights.sum()
+        return ranks
+
+    def quantile_ranks(self, groups: list = (100, 10, 5, 4)) -> np.ndarray:
+        """Calculates quantile ranks for several numbers of groups from one
+        sort, as MicroSeries.quantile_ranks does.
+
+        :param groups: List of numbers of equally weighted groups, defaults
+            to percentiles, deciles, quintiles and quartiles.
+        :type groups: list
+        :returns: Array with a row for each value and a column of ranks for
+            each number of groups.
+        :rtype: np.ndarray
+        """
+        return self._weighted_sort().quantile_ranks(groups)
+
+    def decile_rank(self) -> np.ndarray:
+        return self.quantile_ranks([10])[:, 0]
+
+    def quintile_rank(self) -> np.ndarray:
+        return self.quantile_ranks([5])[:, 0]
+
+    def quartile_rank(self) -> np.ndarray:
+        return self.quantile_ranks([4])[:, 0]
+
+    def percentile_rank(self) -> np.ndarray:
+        return self.quantile_ranks([100])[:, 0]
+
+    __add__ = _binary_operator(np.add)
+    __sub__ = _binary_operator(np.subtract)
+    __mul__ = _binary_operator(np.multiply)
+    __truediv__ = _binary_operator(np.true_divide)
+    __floordiv__ = _binary_operator(np.floor_divide)
+    __mod__ = _binary_operator(np.mod)
+    __pow__ = _binary_operator(np.power)
+    __radd__ = _binary_operator(lambda x, y: np.add(y, x))
+    __rsub__ = _binary_operator(lambda x, y: np.subtract(y, x))
+    __rmul__ = _binary_operator(lambda x, y: np.multiply(y, x))
+    __rtruediv__ = _binary_operator(lambda x, y: np.true_divide(y, x))
+    __rfloordiv__ = _binary_operator(lambda x, y: np.floor_divide(y, x))
+    __rmod__ = _binary_operator(lambda x, y: np.mod(y, x))
+    __rpow__ = _binary_operator(lambda x, y: np.power(y, x))
+    __lt__ = _binary_operator(np.less)
+    __le__ = _binary_operator(np.less_equal)
+    __eq__ = _binary_operator(np.equal)
+    __ne__ = _binary_operator(np.not_equal)
+    __ge__ = _binary_operator(np.greater_equal)
+    __gt__ = _binary_operator(np.greater)
+    __and__ = _binary_operator(np.bitwise_and)
+    __or__ = _binary_operator(np.bitwise_or)
+    __neg__ = _unary_operator(np.negative)
+    __pos__ = _unary_operator(np.positive)
+    __abs__ = _unary_operator(np.abs)
+    __invert__ = _unary_operator(np.invert)
@@ -0,0 +1,175 @@
+import numpy as np
+
+from microdf.counting import counted_quantiles, small_range_codes
+
+# Quantile counts up to which selection beats one full sort.
+MAX_SELECTED_QUANTILES = 4
+# Candidate sets this small are sorted rather than partitioned further.
+SORT_SIZE = 1024
+# Values sampled to choose the pivots of each partition.
+SAMPLE_SIZE = 1024
+# Partitions before falling back to sorting what's left, which bounds the
+# worst case as introselect does.
+MAX_PARTITIONS = 16
+
+
+def select_quantiles(
+    values: np.array, weights: np.array, quantiles: np.array
+) -> np.array:
+    """Calculates weighted quantiles as MicroSeries.quantile does, by
+    interpolating between the cumulative weight at the midpoint of each
+    sorted value. One or a few quantiles are found by weighted selection in
+    expected linear time, partitioning the values around pivots close to
+    each quantile and only sorting the small set left that brackets it.
+    More quantiles, or missing values or weights, use one full sort.
+    Integers in a small range are counted instead, in linear time for any
+    number of quantiles.
+
+    Results are identical to the full sort for integer weights, and
+    otherwise differ only by rounding in the cumulative weights.
+
+    :param values: Array of values.
+    :type values: np.array
+    :param weights: Array of weights.
+    :type weights: np.array
+    :param quantiles: Quantile or array of quantiles to calculate.
+    :type quantiles: np.array
+    :returns: Weighted quantile, or array of weighted quantiles.
+    :rtype: np.array
+    """
+    values = np.asarray(values)
+    weights = np.asarray(weights)
+    quantiles = np.asarray(quantiles)
+    total = np.sum(weights)
+    if not np.isnan(total):
+        codes = small_range_codes(values)
+        if codes is not None:
+            return counted_quantiles(*codes, weights, total, quantiles)
+    if (
+        quantiles.size > MAX_SELECTED_QUANTILES
+        or len(values) <= SORT_SIZE
+        or values.dtype.kind not in "iuf"
+        or np.isnan(total)
+        or (values.dtype.kind == "f" and np.isnan(values).any())
+    ):
+        return _interpolate(values, weights, total, quantiles)
+    rng = np.random.default_rng(0)
+    result = [
+        _select_quantile(values, weights, total, q, rng)
+        for q in quantiles.ravel()
+    ]
+    return np.array(result).reshape(quantiles.shape)
+
+
+def _interpolate(
+    values: np.array,
+    weights: np.array,
+    total: float,
+    quantiles: np.array,
+    below: float = 0,
+    lower: tuple = None,
+    upper: tuple = None,
+) -> np.array:
+    """Sorts values and interpolates quantiles between them.
+
+    :param below: Total weight of values sorted before these.
+    :param lower: (value, weight) of the value sorted just before these,
+        if any.
+    :param upper: (value, weight) of the value sorted just after these, if
+        any.
+    """
+    # A stable sort keeps tied values in their original order, matching
+    # grouped quantiles.
+    order = np.argsort(values, kind="stable")
+    values = values[order]
+    weights = weights[order]
+    cumulative_weights = np.cumsum(weights)
+    if below:
+        cumulative_weights = below + cumulative_weights
+    positions = cumulative_weights - 0.5 * weights
+    if lower is not None:
+        values = np.concatenate([[lower[0]], values])
+        positions = np.concatenate([[below - 0.5 * lower[1]], positions])
+    if upper is not None:
+        end = cumulative_weights[-1] if len(weights) else below
+        values = np.concatenate([values, [upper[0]]])
+        positions = np.concatenate([positions, [end + 0.5 * upper[1]]])
+    return np.interp(quantiles, positions / total, values)
+
+
+def _pivots(
+    values: np.array, weights: np.array, share: float, rng
+) -> tuple:
+    """Chooses two values from a random sample that likely bracket the
+    given share of the weight, and lie close to it.
+    """
+    sample = rng.integers(0, len(values), SAMPLE_SIZE)
+    order = np.argsort(values[sample])
+    sample_values = values[sample][order]
+    cumulative = np.cumsum(weights[sample][order])
+    if cumulative[-1] > 0:
+        cumulative = cumulative / cumulative[-1]
+    else:
+        cumulative = np.arange(1, SAMPLE_SIZE + 1) / SAMPLE_SIZE
+    margin = 2 / np.sqrt(SAMPLE_SIZE)
+    lower, upper = np.searchsorted(
+        cumulative, [share - margin, share + margin]
+    )
+    last = SAMPLE_SIZE - 1
+    return sample_values[min(lower, last)], sample_values[min(upper, last)]
+
+
+def _select_quantile(
+    values: np.array, weights: np.array, total: float, q: float, rng
+) -> float:
+    target = q * total
+    # Weight of the values sorted before the candidates, and the values
+    # just outside them, which the quantile may be interpolated from.
+    below = 0
+    lower = upper = None
+    for _ in range(MAX_PARTITIONS):
+        if len(values) <= SORT_SIZE:
+            break
+        candidate_weight = np.sum(weights)
+        share = (target - below) / candidate_weight
+        low_pivot, high_pivot = _pivots(values, weights, share, rng)
+        is_below = values < low_pivot
+        is_above = values > high_pivot
+        below_weight = np.sum(weights[is_below])
+        middle_end = below + candidate_weight - np.sum(weights[is_above])
+        # Keep the part whose cumulative weights reach the target. The
+        # midpoint of the value just outside it is then on the far side of
+        # the target, so interpolation never needs the rest.
+        if target < below + below_weight:
+            is_low_pivot = values == low_pivot
+            upper = (low_pivot, weights[is_low_pivot][0])
+            keep = is_below
+        elif target >= middle_end:
+            is_high_pivot = values == high_pivot
+            lower = (high_pivot, weights[is_high_pivot][-1])
+            below = middle_end
+            keep = is_above
+        else:
+            if is_below.any():
+                lower = _last_max(values[is_below], weights[is_below])
+            if is_above.any():
+                upper = _first_min(values[is_above], weights[is_above])
+            below += below_weight
+            keep = ~(is_below | is_above)
+            if low_pivot == high_pivot:
+                # Only one value is left.
+                values, weights = values[keep], weights[keep]
+                break
+        values, weights = values[keep], weights[keep]
+    return _interpolate(values, weights, total, q, below, lower, upper)
+
+
+def _last_max(values: np.array, weights: np.array) -> tuple:
+    # The stable sort puts the last of tied values after the others.
+    i = len(values) - 1 - np.argmax(values[::-1])
+    return values[i], weights[i]
+
+
+def _first_min(values: np.array, weights: np.array) -> tuple:
+    i = np.argmin(values)
+    return values[i], weights[i]
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class WeightedQuantileSketch:
+    def __init__(self, compression: float = 1000):
+        """Mergeable summary of a weighted distribution, for quantiles of
+        data that doesn't fit in memory. Values are merged into weighted
+        centroids, t-digest style: the centroids are small in the tails and
+        larger near the median. Values are only merged once there are more
+        than compression of them, and merging leaves about compression / 2
+        centroids, so a sketch holds at most compression centroids, or
+        about 16 * compression bytes, however much data is added.
+
+        Quantiles are interpolated between the centroids as
+        MicroSeries.quantile interpolates between values. While the sketch
+        holds no more than compression values none are merged, so quantiles
+        are exact. Beyond that, a centroid around quantile q holds at most
+        about 2 * pi * sqrt(q * (1 - q)) / compression of the total weight,
+        or a single record, and a quantile's rank error is bounded by the
+        weight of the centroids around it: about 0.3% at the median and far
+        less in the tails for the default compression. The bound holds for
+        each compression; merged sketches can have overlapping centroids,
+        so it isn't strict for them, but errors stay of the same order.
+
+        :param compression: Size of the sketch, trading memory for accuracy,
+            defaults to 1000.
+        :type compression: float
+        """
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def total_weight(self) -> float:
+        return np.sum(self.weights)
+
+    def update(
+        self, values: np.array, weights: np.array = None
+    ) -> "WeightedQuantileSketch":
+        """Adds values to the sketch. Missing values are skipped.
+
+        :param values: Array of values.
+        :type values: np.array
+        :param weights: Array of weights, defaults to ones.
+        :type weights: np.array
+        :returns: The sketch.
+        :rtype: WeightedQuantileSketch
+        """
+        values = np.asarray(values, dtype=float)
+        if weights is None:
+            weights = np.ones(len(values))
+        weights = np.asarray(weights, dtype=float)
+        keep = ~np.isnan(values) & (weights > 0)
+        self._compress(
+            np.concatenate([self.means, values[keep]]),
+            np.concatenate([self.weights, weights[keep]]),
+        )
+        return self
+
+    def merge(
+        self, other: "WeightedQuantileSketch"
+    ) -> "WeightedQuantileSketch":
+        """Adds another sketch's data to this one, as if it had been added
+        to this sketch directly.
+
+        :param other: Sketch to merge in.
+        :type other: WeightedQuantileSketch
+        :returns: The sketch.
+        :rtype: WeightedQuantileSketch
+        """
+        self._compress(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        return self
+
+    def _compress(self, means: np.array, weights: np.array) -> None:
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        if len(means) > self.compression:
+            cumulative_weights = np.cumsum(weights)
+            left = (cumulative_weights - weights) / cumulative_weights[-1]
+            # Centroids each span one unit of this scale, which is steep in
+            # the tails so they hold little weight there.
+            scale = self.compression / (2 * np.pi) * np.arcsin(2 * left - 1)
+            bins = np.floor(scale)
+            starts = np.flatnonzero(np.diff(bins, prepend=-np.inf))
+            merged_weights = np.add.reduceat(weights, starts)
+            means = np.add.reduceat(means * weights, starts) / merged_weights
+            weights = merged_weights
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: np.array) -> np.array:
+        """Estimates weighted quantiles.
+
+        :param q: Quantile or array of quantiles to calculate.
+        :type q: np.array
+        :returns: Weighted quantile, or array of weighted quantiles.
+        :rtype: np.array
+        """
+        quantiles = np.array(q)
+        assert np.all(quantiles >= 0) and np.all(
+            quantiles <= 1
+        ), "quantiles should be in [0, 1]"
+        positions = np.cumsum(self.weights) - 0.5 * self.weights
+        return np.interp(quantiles, positions / self.total_weight, self.means)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+
+class WeightedSummary:
+    def __init__(self, bins: np.array = None):
+        """Mergeable accumulator of weighted summary statistics, for
+        aggregating chunks or partitions separately and combining the
+        results. Holds the number of records, weighted count, sum and
+        mean, the weighted sum of squared deviations from the mean for the
+        variance, the minimum and maximum, and optionally a weighted
+        histogram. Means and variances are combined with Chan's parallel
+        update, which stays accurate however the data is split.
+
+        Missing values are skipped. Otherwise, the count, sum and mean are
+        those of MicroSeries.count, sum and mean over all the data.
+
+        :param bins: Array of histogram bin edges, as in np.histogram.
+            Values outside them aren't counted. Defaults to no histogram.
+        :type bins: np.array
+        """
+        self.n = 0
+        self.count = 0.0
+        self.sum = 0.0
+        self.mean = np.nan
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.bins = None if bins is None else np.asarray(bins, dtype=float)
+        self.histogram = (
+            None if bins is None else np.zeros(len(self.bins) - 1)
+        )
+
+    @property
+    def variance(self) -> float:
+        """Weighted population variance."""
+        return self.m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self) -> float:
+        """Weighted population standard deviation."""
+        return np.sqrt(self.variance)
+
+    def update(
+        self, values: np.array, weights: np.array = None
+    ) -> "WeightedSummary":
+        """Adds values to the summary.
+
+        :param values: Array of values.
+        :type values: np.array
+        :param weights: Array of weights, defaults to ones.
+        :type weights: np.array
+        :returns: The summary.
+        :rtype: WeightedSummary
+        """
+        values = np.asarray(values, dtype=float)
+        if weights is None:
+            weights = np.ones(len(values))
+        weights = np.asarray(weights, dtype=float)
+        valid = ~np.isnan(values)
+        values, weights = values[valid], weights[valid]
+        chunk = WeightedSummary(self.bins)
+        chunk.n = len(values)
+        chunk.count = np.sum(weights)
+        chunk.sum = np.dot(values, weights)
+        if chunk.count:
+            chunk.mean = chunk.sum / chunk.count
+            chunk.m2 = np.dot(weights, (values - chunk.mean) ** 2)
+        if len(values):
+            chunk.min, chunk.max = values.min(), values.max()
+        if self.bins is not None:
+            chunk.histogram, _ = np.histogram(
+                values, self.bins, weights=weights
+            )
+        return self.merge(chunk)
+
+    def merge(self, other: "WeightedSummary") -> "WeightedSummary":
+        """Adds another summary's data to this one.
+
+        :param other: Summary to merge in, with the same histogram bins.
+        :type other: WeightedSummary
+        :returns: The summary.
+        :rtype: WeightedSummary
+        """
+        if (self.bins is None) != (other.bins is None) or (
+            self.bins is not None and not np.array_equal(self.bins, other.bins)
+        ):
+            raise ValueError("Summaries must have the same histogram bins.")
+        count = self.count + other.count
+        if not other.count:
+            mean, m2 = self.mean, self.m2
+        elif not self.count:
+            mean, m2 = other.mean, other.m2
+        else:
+            delta = other.mean - self.mean
+            mean = self.mean + delta * other.count / count
+            m2 = (
+                self.m2
+                + other.m2
+                + delta ** 2 * self.count * other.count / count
+            )
+        self.n += other.n
+        self.count = count
+        self.sum += other.sum
+        self.mean, self.m2 = mean, m2
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.bins is not None:
+            self.histogram = self.histogram + other.histogram
+        return self
+
+    def to_series(self) -> pd.Series:
+        """Returns the summary statistics, without the histogram.
+
+        :returns: Series of n, count, sum, mean, variance, std, min and
+            max. The minimum and maximum of no values are missing.
+        :rtype: pd.Series
+        """
+        return pd.Series(
+            {
+                "n": self.n,
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.mean,
+                "variance": self.variance,
+                "std": self.std,
+                "min": self.min if self.n else np.nan,
+                "max": self.max if self.n else np.nan,
+            }
+        )
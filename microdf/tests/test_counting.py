@@ -0,0 +1,42 @@
+import numpy as np
+
+import microdf as mdf
+from microdf.counting import small_range_codes
+
+
+def test_small_range_codes():
+    assert small_range_codes(np.array([3, 1, 2]))[0].tolist() == [2, 0, 1]
+    assert small_range_codes(np.array([3.0, 1.0])) is not None
+    assert small_range_codes(np.array([3.5, 1.0])) is None
+    assert small_range_codes(np.array([3.0, np.nan])) is None
+    assert small_range_codes(np.array([0, 10 ** 6])) is None
+    assert small_range_codes(np.array([0, 10 ** 6]), small_range=True)
+    assert small_range_codes(np.array([0, 2 ** 32]), small_range=True) is None
+    assert small_range_codes(np.array([3, 1]), small_range=False) is None
+
+
+def test_counted_matches_sorted():
+    rng = np.random.default_rng(0)
+    ages = rng.integers(0, 90, 5000)
+    weights = rng.integers(1, 10, 5000).astype(float)
+    counted = mdf.WeightedECDF(ages, weights)
+    sorted_ = mdf.WeightedECDF(ages, weights, small_range=False)
+    assert counted._codes is not None
+    quantiles = [0, 0.1, 0.5, 0.9, 1]
+    assert np.array_equal(
+        counted.quantile(quantiles), sorted_.quantile(quantiles)
+    )
+    assert np.array_equal(counted.ranks(), sorted_.ranks())
+    for negatives in [None, "zero", "shift"]:
+        assert np.isclose(counted.gini(negatives), sorted_.gini(negatives))
+    s = mdf.MicroSeries(ages, weights=weights)
+    assert np.array_equal(s.quantile(quantiles), sorted_.quantile(quantiles))
+
+
+def test_counted_zero_weights():
+    ages = np.array([3, 1, 2])
+    counted = mdf.WeightedECDF(ages, np.zeros(3))
+    sorted_ = mdf.WeightedECDF(ages, np.zeros(3), small_range=False)
+    assert np.isnan(counted.quantile([0, 0.5, 1])).all()
+    assert np.isnan(sorted_.quantile([0, 0.5, 1])).all()
+    assert np.isnan(mdf.MicroSeries(ages, weights=np.zeros(3)).median())
@@ -2,6 +2,7 @@ from microdf.generic import MicroDataFrame, MicroSeries
 import numpy as np
 import microdf as mdf
 import pandas as pd
+import pytest
 
 
 def test_df_init():
@@ -206,3 +207,367 @@ def test_value_subset():
     d = mdf.MicroDataFrame({"x": [1, 2, 3], "y": [1, 2, 2]}, weights=[4, 5, 6])
     d2 = d[d.y > 1]
     assert d2.y.shape == d2.weights.shape
+
+
+def test_sort_cache():
+    s = mdf.MicroSeries([3, 1, 2, 5], weights=[1, 2, 3, 4])
+    s.gini()
+    sort = s._sort_cache
+    # Other order statistics reuse the same sort.
+    s.median()
+    s.rank()
+    s.top_10_pct_share()
+    assert s._sort_cache is sort
+    # Changing the values or weights drops it.
+    s.iloc[0] = 10
+    assert s._sort_cache is None
+    s2 = mdf.MicroSeries([10, 1, 2, 5], weights=[1, 2, 3, 4])
+    assert s.median() == s2.median()
+    s.set_weights([4, 3, 2, 1])
+    assert s._sort_cache is None
+    s.median()
+    s.weights *= 2
+    assert s._sort_cache is None
+
+
+def test_sort_cache_inplace_operator():
+    d = mdf.MicroDataFrame({"x": [1, 2, 3]}, weights=[1, 1, 5])
+    x = d.x
+    median = x.median()
+    x -= 3
+    # The column was modified in place, so its cached sort is stale.
+    assert np.isclose(d.x.median(), median - 3)
+
+
+def test_groupby_vectorised_matches_per_group():
+    np.random.seed(0)
+    n = 200
+    values = np.random.normal(size=n)
+    weights = np.random.uniform(1, 5, size=n)
+    keys = np.random.choice(["a", "b", "c", "d"], size=n)
+    s = mdf.MicroSeries(values, weights=weights)
+    gb = s.groupby(keys)
+    for group in ["a", "b", "c", "d"]:
+        mask = keys == group
+        group_s = mdf.MicroSeries(values[mask], weights=weights[mask])
+        assert np.isclose(gb.sum()[group], group_s.sum())
+        assert np.isclose(gb.count()[group], group_s.count())
+        assert np.isclose(gb.mean()[group], group_s.mean())
+        assert np.allclose(gb.rank()[group], group_s.rank())
+        assert np.array_equal(
+            gb.decile_rank()[group], group_s.decile_rank().values
+        )
+
+
+def test_groupby_multiple_keys_rank():
+    s = mdf.MicroSeries([4, 1, 3, 2, 5], weights=[1, 2, 3, 4, 5])
+    ranks = s.groupby([[1, 1, 2, 2, 1], ["x", "x", "y", "y", "x"]]).rank()
+    assert ranks.index.nlevels == 3
+    assert ranks.tolist() == [3, 2, 8, 7, 4]
+
+
+def test_groupby_quantile_matches_per_group():
+    rng = np.random.default_rng(1)
+    n = 300
+    values = rng.integers(0, 20, size=n)
+    weights = rng.uniform(0, 3, size=n)
+    keys = rng.choice([1, 2, 3], size=n)
+    q = [0, 0.1, 0.5, 0.9, 1]
+    quantiles = mdf.MicroSeries(values, weights=weights).groupby(keys)
+    quantiles = quantiles.quantile(q)
+    for group in [1, 2, 3]:
+        mask = keys == group
+        group_s = mdf.MicroSeries(values[mask], weights=weights[mask])
+        assert np.allclose(quantiles[group], group_s.quantile(q))
+
+
+def test_dataframe_groupby_leaves_frame_unchanged():
+    d = mdf.MicroDataFrame(
+        {"g": [1, 1, 2, 2, 2], "x": [1, 2, 3, 4, 5], "y": [5, 4, 3, 2, 1]},
+        weights=[1, 2, 3, 4, 5],
+    )
+    gb = d.groupby("g")
+    assert list(d.columns) == ["g", "x", "y"]
+    assert gb.sum().x.tolist() == [5, 50]
+    assert gb.y.sum().tolist() == [13, 22]
+    assert np.allclose(gb[["x"]].mean().x, [5 / 3, 50 / 12])
+    # Functions without a vectorised form run on each group.
+    assert np.isclose(
+        gb.x.gini()[2], mdf.MicroSeries([3, 4, 5], weights=[3, 4, 5]).gini()
+    )
+
+
+def test_linear_functions_match_columns():
+    d = mdf.MicroDataFrame(
+        {"x": [1, np.nan, 3], "y": [1, 2, 3], "z": [True, False, True]},
+        weights=[1, 2, 3],
+    )
+    for name in ["sum", "count", "mean"]:
+        expected = [getattr(d[col], name)() for col in d.columns]
+        assert np.allclose(
+            getattr(d, name)(), expected, equal_nan=True
+        ), name
+    # Non-numeric columns fall back to their MicroSeries.
+    d = mdf.MicroDataFrame({"x": [1, 2], "s": ["a", "b"]}, weights=[1, 3])
+    assert d.count().tolist() == [4, 4]
+    # Arguments the weighted functions don't take are rejected rather than
+    # ignored.
+    for kwargs in [dict(axis=1), dict(skipna=False), dict(numeric_only=True)]:
+        with pytest.raises(TypeError):
+            d.sum(**kwargs)
+    with pytest.raises(TypeError):
+        d.mean(1)
+
+
+def test_quantile_matches_columns():
+    rng = np.random.default_rng(2)
+    d = mdf.MicroDataFrame(
+        {
+            "x": rng.integers(0, 5, 50).astype(float),
+            "y": rng.normal(size=50),
+            "z": rng.integers(0, 2, 50).astype(bool),
+        },
+        weights=rng.uniform(0, 2, 50),
+    )
+    q = [0, 0.1, 0.5, 0.77, 1]
+    expected = np.array([d[col].quantile(q) for col in d.columns])
+    for n_threads in [1, 2]:
+        result = d.quantile(q, n_threads=n_threads)
+        assert list(result.index) == ["x", "y", "z"]
+        assert np.allclose(result, expected)
+    assert np.allclose(d.quantile(0.5), expected[:, 2])
+
+
+def test_derived_series_share_weights():
+    w = np.array([1.0, 2, 3])
+    a = mdf.MicroSeries([1, 2, 3], weights=w)
+    b = mdf.MicroSeries([3, 2, 1], weights=w)
+    result = (a - b) * a > 0
+    assert np.shares_memory(result.weights.values, a.weights.values)
+    assert np.shares_memory(a.weights.values, w)
+    # Changing the weights of a copy leaves the original alone.
+    c = a.copy()
+    c.weights *= 2
+    assert c.weights.tolist() == [2, 4, 6]
+    assert a.weights.tolist() == [1, 2, 3]
+    # Writing to shared weights copies them first.
+    a.memoize()
+    assert a.sum() == 14
+    a.weights[0] = 5
+    a.weights.iloc[1] = 0
+    a.weights.loc[2] = 1
+    assert a.weights.tolist() == [5, 0, 1]
+    assert a.sum() == 8
+    assert result.weights.tolist() == [1, 2, 3]
+    assert w.tolist() == [1, 2, 3]
+    d = mdf.MicroDataFrame({"x": [1, 2, 3]}, weights=w)
+    assert d.x.sum() == 14
+    d.weights[0] = 5
+    assert d.x.sum() == 18
+    assert d.sum().tolist() == [18]
+    assert w.tolist() == [1, 2, 3]
+
+
+def _set_at(w):
+    w.at[0] = 10
+
+
+def _set_iat(w):
+    w.iat[0] = 10
+
+
+def _set_loc(w):
+    w.loc[0] = 10
+
+
+def _set_iloc(w):
+    w.iloc[0] = 10
+
+
+@pytest.mark.parametrize(
+    "write, expected",
+    [
+        (_set_at, [10, 2, 3, 4]),
+        (_set_iat, [10, 2, 3, 4]),
+        (_set_loc, [10, 2, 3, 4]),
+        (_set_iloc, [10, 2, 3, 4]),
+        (lambda w: w.update({0: 10.0}), [10, 2, 3, 4]),
+        (lambda w: w.clip(upper=2, inplace=True), [1, 2, 2, 2]),
+        (lambda w: w.where(w < 3, 0, inplace=True), [1, 2, 0, 0]),
+    ],
+)
+def test_weights_written_in_place(write, expected):
+    s = mdf.MicroSeries([1.0, 2, 3, 4], weights=[1, 2, 3, 4]).memoize()
+    derived = s * 1
+    assert s.sum() == 30
+    write(s.weights)
+    assert s.weights.tolist() == expected
+    # Memoized statistics follow, and weights shared with s don't.
+    assert s.sum() == np.dot([1, 2, 3, 4], expected)
+    assert derived.weights.tolist() == [1, 2, 3, 4]
+
+
+def test_pandas_results_keep_weights():
+    s = mdf.MicroSeries([1.0, -2, np.nan, 4], weights=[1, 2, 3, 4])
+    for result in [s.abs(), s.fillna(0), s.clip(0), s.isna()]:
+        assert isinstance(result, MicroSeries)
+        assert result.weights.tolist() == [1, 2, 3, 4]
+    for result in [s.head(2), s.iloc[:2], s[:2], s.loc[[0, 1]], s.loc[:1]]:
+        assert isinstance(result, MicroSeries)
+        assert result.weights.tolist() == [1, 2]
+    assert s.iloc[[3, 0]].weights.tolist() == [4, 1]
+    assert s.loc[[0, 3]].sum() == 17
+    assert s[s > 0].weights.tolist() == [1, 4]
+    assert s[s > 0].sum() == 17
+    assert s.tail(1).weights.tolist() == [4]
+    # Labels the MicroSeries doesn't have get no weights.
+    assert not isinstance(s.reindex([0, 5]), MicroSeries)
+
+
+def test_label_attributes():
+    s = mdf.MicroSeries([1, 2, 3], index=["a", "b", "a"], weights=[1, 2, 3])
+    # A unique label gives a scalar, not a MicroSeries.
+    assert s.b == 2
+    assert s.a.weights.tolist() == [1, 3]
+    assert not hasattr(s, "c")
+
+
+def test_weight_column_unweighted():
+    md = mdf.MicroDataFrame(
+        {"x": [1, 2, 3, 4], "w": [1, 2, 1, 2]}, weights="w"
+    )
+    # The weight column sums to the population, not the sum of squares.
+    assert md.w.sum() == 6
+    assert md["w"].sum() == 6
+    assert md.sum().tolist() == [16, 6]
+    assert md.count().tolist() == [6, 4]
+    assert md.mean().tolist() == [16 / 6, 1.5]
+
+
+def test_columns_weighted_on_access():
+    d = mdf.MicroDataFrame({"x": [1, 2, 3]}, weights=[1, 2, 3])
+    d["y"] = d.x * 2
+    assert isinstance(d.y, MicroSeries)
+    assert d.y.sum() == 28
+    # Columns already accessed follow new weights.
+    x = d.x
+    d.set_weights([1, 1, 1])
+    assert x.sum() == 6
+    assert all(isinstance(col, MicroSeries) for _, col in d.items())
+
+
+def test_weighted_methods_on_class():
+    d = mdf.MicroDataFrame({"x": [1, 2, 3]}, weights=[1, 2, 3])
+    assert "gini" not in vars(d)
+    assert MicroDataFrame.gini.__doc__ == MicroSeries.gini.__doc__
+    assert d.gini().x == d.x.gini()
+
+
+def test_copy_on_write():
+    base = mdf.MicroDataFrame(
+        {"x": [1.0, 2.0], "y": [3.0, 4.0]}, weights=[1, 2]
+    )
+    x = base.x
+    reform = base.copy(copy_on_write=True)
+    # The source's columns are left as they were.
+    assert base.x is x
+    reform.x += 1
+    reform.weights *= 2
+    assert base.x.tolist() == [1, 2]
+    assert base.weights.tolist() == [1, 2]
+    assert reform.x.sum() == 16
+    assert np.shares_memory(reform.y.values, base.y.values)
+    reform.loc[0, "y"] = 0
+    assert reform.y.tolist() == [0, 4]
+    assert base.y.tolist() == [3, 4]
+    # Writing to the source leaves the copy, and its cached statistics,
+    # alone too.
+    reform = base.copy(copy_on_write=True)
+    median = reform.x.memoize().median()
+    base.loc[1, "x"] = 100
+    base["y"] += 1
+    x -= 1
+    assert base.x.tolist() == [1, 100]
+    assert base.y.tolist() == [4, 5]
+    assert reform.x.tolist() == [1, 2]
+    assert reform.y.tolist() == [3, 4]
+    assert reform.x.median() == median
+    assert reform.x.cache_info().hits == 1
+    reform = base.copy(copy_on_write=True)
+    base.at[1, "y"] = 9
+    base.iat[0, 0] = 7
+    base.fillna(0, inplace=True)
+    base[base >= 100] = 0
+    assert base.x.tolist() == [7, 0]
+    assert reform.x.tolist() == [1, 100]
+    assert reform.y.tolist() == [4, 5]
+    # The source's own arrays stay writeable.
+    base = mdf.MicroDataFrame({"x": [1.0, 2.0]}, weights=[1, 2])
+    reform = base.copy(copy_on_write=True)
+    base.values[0, 0] = 7
+    base.to_numpy()[1, 0] = 8
+    assert base.x.tolist() == [7, 8]
+
+
+def test_memoize():
+    s = mdf.MicroSeries([1, 2, 3, 10], weights=[4, 3, 2, 1]).memoize()
+    gini = s.gini()
+    assert s.gini() == gini
+    assert s.cache_info().hits == 1
+    s[3] = 100
+    assert s.gini() != gini
+    s.weights = [1, 1, 1, 1]
+    assert s.median() == 2.5
+    assert s.cache_info().currsize == 1
+    d = mdf.MicroDataFrame({"x": [1, 2]}, weights=[1, 2])
+    x = d.x.memoize()
+    assert x.sum() == 5
+    d.loc[0, "x"] = 5
+    assert x.sum() == 9
+
+
+def test_ecdf():
+    rng = np.random.default_rng(3)
+    s = mdf.MicroSeries(rng.normal(size=200), weights=rng.uniform(1, 5, 200))
+    ecdf = s.ecdf()
+    assert np.isclose(ecdf.share(0.9, 1), s.top_10_pct_share())
+    assert np.isclose(ecdf.share(0, 0.5), s.bottom_50_pct_share())
+    assert np.allclose(ecdf.cdf(s.values), s.rank(pct=True))
+    assert np.array_equal(ecdf.percentile_rank(s.values), s.percentile_rank())
+    assert np.allclose(ecdf.quantile([0.1, 0.5]), s.quantile([0.1, 0.5]))
+    # New values outside the distribution.
+    assert ecdf.cdf([-100, 100]).tolist() == [0, 1]
+    # A snapshot, unaffected by later changes to the MicroSeries.
+    s = mdf.MicroSeries([1.0, 2, 3, 4])
+    s.median()
+    ecdf = s.ecdf()
+    ecdf.order
+    s.iloc[0] = 100
+    assert ecdf.values.tolist() == [1, 2, 3, 4]
+    assert ecdf.quantile(1) == 4
+    assert s.quantile(1) == 100
+
+
+def test_gini_missing_values():
+    # Missing values are left out with their weights.
+    s = mdf.MicroSeries([1, 2, np.nan, 4], weights=[1, 2, 3, 4])
+    expected = mdf.MicroSeries([1, 2, 4], weights=[1, 2, 4]).gini()
+    assert np.isclose(s.gini(), expected)
+    assert np.isclose(
+        mdf.MicroSeries([1, 2, np.nan, 4]).gini(),
+        mdf.MicroSeries([1.0, 2, 4]).gini(),
+    )
+    assert np.isnan(mdf.MicroSeries([np.nan, np.nan]).gini())
+
+
+def test_quantile_ranks():
+    rng = np.random.default_rng(4)
+    s = mdf.MicroSeries(rng.normal(size=500), weights=rng.uniform(1, 5, 500))
+    ranks = s.quantile_ranks()
+    assert ranks.columns.tolist() == [100, 10, 5, 4]
+    assert ranks.index.equals(s.index)
+    assert np.array_equal(ranks[100], s.percentile_rank())
+    assert np.array_equal(ranks[10], s.decile_rank())
+    assert np.array_equal(ranks[5], s.quintile_rank())
+    assert np.array_equal(ranks[4], s.quartile_rank())
+    assert np.allclose(s.quantile_ranks([1])[1], 1)
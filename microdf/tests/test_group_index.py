@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import microdf as mdf
+
+
+rng = np.random.default_rng(0)
+N = 100
+df = pd.DataFrame(
+    {
+        "x": rng.normal(size=N),
+        "y": rng.integers(0, 10, size=N),
+        "w": rng.uniform(1, 3, size=N),
+        "g": rng.choice(["a", "b", "c"], size=N),
+        "h": rng.choice([1, 2], size=N),
+    }
+)
+
+
+def test_weighted_functions():
+    group_index = mdf.GroupIndex(df, ["g", "h"])
+    for fn in [mdf.weighted_sum, mdf.weighted_mean]:
+        assert np.allclose(
+            fn(df, "x", "w", group_index), fn(df, "x", "w", ["g", "h"])
+        )
+        assert np.allclose(
+            fn(df, ["x", "y"], "w", group_index),
+            fn(df, ["x", "y"], "w", ["g", "h"]),
+        )
+        # Unweighted.
+        assert np.allclose(
+            fn(df, "x", groupby=group_index), fn(df, "x", groupby=["g", "h"])
+        )
+    for fn in [mdf.weighted_median, mdf.gini, mdf.t10_b50]:
+        assert np.allclose(
+            fn(df, "x", "w", groupby=group_index),
+            fn(df, "x", "w", groupby=["g", "h"]),
+        )
+
+
+def test_groupby():
+    group_index = mdf.GroupIndex(df, "g")
+    ms = mdf.MicroSeries(df.x, weights=df.w)
+    assert ms.groupby(group_index).sum().equals(ms.groupby(df.g).sum())
+    md = mdf.MicroDataFrame(df[["x", "y", "g"]], weights=df.w)
+    assert np.allclose(
+        md.groupby(group_index).y.median(), md.groupby("g").y.median()
+    )
+    # The same GroupIndex is shared by every column.
+    gb = md.groupby(group_index)
+    assert gb.x._group_index() is gb.y._group_index() is group_index
+
+
+def test_length_mismatch():
+    group_index = mdf.GroupIndex(df, "g")
+    with pytest.raises(ValueError):
+        mdf.weighted_sum(df.head(10), "x", "w", group_index)
@@ -1,5 +1,6 @@
 import microdf as mdf
 
+import numpy as np
 import pandas as pd
 
 
@@ -18,3 +19,45 @@ def test_top_pct():
     RES = 9 / 14
     assert mdf.top_50_pct_share(df, "x", "w") == RES
     assert ms.top_50_pct_share() == RES
+
+
+def test_inequality_summary():
+    x = [1, 5, 2, 8, 3, 0, 12]
+    w = [4, 1, 1, 2, 3, 2, 1]
+    ms = mdf.MicroSeries(x, weights=w)
+    summary = ms.inequality_summary(
+        quantiles=[0.25, 0.5], top_shares=[0.1, 0.5], bottom_shares=[0.5]
+    )
+    assert np.isclose(summary["gini"], ms.gini())
+    assert np.isclose(summary["t10_b50"], ms.t10_b50())
+    assert np.isclose(summary["top_10_pct_share"], ms.top_10_pct_share())
+    assert np.isclose(summary["top_50_pct_share"], ms.top_50_pct_share())
+    assert np.isclose(
+        summary["bottom_50_pct_share"], ms.bottom_50_pct_share()
+    )
+    assert np.allclose(
+        summary[["quantile_0.25", "quantile_0.5"]], ms.quantile([0.25, 0.5])
+    )
+
+
+def test_grouped_matches_per_group():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame(
+        {
+            "x": rng.normal(5, 3, n).round(),
+            "w": rng.uniform(0, 3, n),
+            "g": rng.choice(["a", "b", "c"], n),
+            "h": rng.choice([1, 2], n),
+        }
+    )
+    for negatives in [None, "zero", "shift"]:
+        grouped = mdf.gini(df, "x", "w", negatives, groupby=["g", "h"])
+        per_group = df.groupby(["g", "h"]).apply(
+            lambda x: mdf.gini(x, "x", "w", negatives)
+        )
+        assert np.allclose(grouped, per_group)
+    for fn in [mdf.top_10_pct_share, mdf.bottom_50_pct_share, mdf.t10_b50]:
+        grouped = fn(df, "x", "w", "g")
+        per_group = df.groupby("g").apply(lambda x: fn(x, "x", "w"))
+        assert np.allclose(grouped, per_group)
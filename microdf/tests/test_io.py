@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+import pytest
+
 import microdf as mdf
 
 
@@ -8,3 +12,107 @@ def test_read_stata_zip():
     df = mdf.read_stata_zip(SCF2016, columns=COLS)
     assert df.columns.tolist() == COLS
     assert df.shape[0] > 0
+
+
+DF = pd.DataFrame(
+    {
+        "income": [10.0, 60, 30, np.nan, 80, 20, 50],
+        "threshold": 40.0,
+        "state": ["a", "b", "a", "b", "a", "b", "a"],
+        "w": [1.0, 2, 3, 4, 5, 6, 7],
+    }
+)
+
+
+def check_chunks(path):
+    chunks = list(mdf.read_chunks(path, weights="w", chunksize=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert all(isinstance(chunk, mdf.MicroDataFrame) for chunk in chunks)
+    assert all(chunk.dtypes.equals(DF.dtypes) for chunk in chunks)
+    assert chunks[1].index.tolist() == [3, 4, 5]
+    assert chunks[2].weights.tolist() == [7]
+    projected = next(mdf.read_chunks(path, "w", ["income"], chunksize=3))
+    assert projected.columns.tolist() == ["income", "w"]
+    result = mdf.stream_agg(
+        mdf.read_chunks(path, weights="w", chunksize=3),
+        sums=["income"],
+        means=["income"],
+        poverty_rates={"poverty_rate": ("income", "threshold")},
+        groupby="state",
+    )
+    md = mdf.MicroDataFrame(DF, weights="w")
+    assert np.allclose(result.income_sum, md.groupby("state").income.sum())
+    a = DF[DF.state == "a"]
+    assert np.isclose(result.income_mean["a"], np.average(a.income, None, a.w))
+    assert np.isclose(
+        result.poverty_rate["b"],
+        mdf.poverty_rate(DF[DF.state == "b"], "income", "threshold", "w"),
+    )
+
+
+def test_read_chunks_csv(tmp_path):
+    DF.to_csv(tmp_path / "data.csv", index=False)
+    check_chunks(tmp_path / "data.csv")
+
+
+def test_read_chunks_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    DF.to_parquet(tmp_path / "data.parquet", row_group_size=2)
+    check_chunks(tmp_path / "data.parquet")
+
+
+def test_stream_agg_ungrouped():
+    md = mdf.MicroDataFrame(DF, weights="w")
+    chunks = [md[:4], md[4:]]
+    result = mdf.stream_agg(chunks, sums=["income"])
+    assert result.tolist() == [md.w.values.sum(), md.income.sum()]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_arrow_round_trip(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    write = f"to_{fmt}"
+    read = getattr(mdf, f"read_{fmt}")
+    md = mdf.MicroDataFrame(DF.drop(columns="w"), weights=DF.w.values)
+    path = tmp_path / f"data.{fmt}"
+    getattr(md, write)(path)
+    result = read(path)
+    assert result.columns.tolist() == md.columns.tolist()
+    assert result.weights.tolist() == md.weights.tolist()
+    projected = read(path, columns=["income"], filters=[("state", "=", "a")])
+    assert projected.columns.tolist() == ["income"]
+    assert projected.weights.tolist() == [1, 3, 5, 7]
+    # A weight column stays a column.
+    md = mdf.MicroDataFrame(DF, weights="w")
+    getattr(md, write)(path)
+    result = read(path, columns=["income"])
+    assert result.columns.tolist() == ["income", "w"]
+    assert result.weights_col == "w"
+    assert np.isclose(result.income.sum(), md.income.sum())
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_arrow_index(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    # A RangeIndex is stored as metadata, and other indexes as columns.
+    md = mdf.MicroDataFrame(DF.set_axis([7, 6, 5, 4, 3, 2, 1]), weights="w")
+    path = tmp_path / f"data.{fmt}"
+    getattr(md, f"to_{fmt}")(path)
+    read = getattr(mdf, f"read_{fmt}")
+    assert read(path, columns=["income"]).index.tolist() == md.index.tolist()
+    filtered = read(path, columns=["income"], filters=[("state", "=", "b")])
+    assert filtered.index.tolist() == [6, 4, 2]
+    assert filtered.columns.tolist() == ["income", "w"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "feather"])
+def test_arrow_round_trip_series(tmp_path, fmt):
+    pytest.importorskip("pyarrow")
+    s = mdf.MicroSeries([1.0, 2, 3], weights=[1, 2, 3])
+    path = tmp_path / f"data.{fmt}"
+    getattr(s, f"to_{fmt}")(path)
+    result = getattr(mdf, f"read_{fmt}")(path)
+    assert result.columns.tolist() == ["value"]
+    assert result.value.tolist() == [1, 2, 3]
+    assert result.weights.tolist() == [1, 2, 3]
+    assert result.value.sum() == 14
@@ -0,0 +1,34 @@
+import numpy as np
+
+import microdf as mdf
+
+
+def test_matches_micro_series():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=100)
+    weights = rng.uniform(1, 3, size=100)
+    s = mdf.MicroSeries(values, weights=weights)
+    a = mdf.MicroArray(s)
+    assert np.shares_memory(a.values, s.values)
+    assert np.shares_memory(a.weights, s.weights.values)
+    for name in ["sum", "count", "mean", "median", "gini", "t10_b50"]:
+        assert np.isclose(getattr(a, name)(), getattr(s, name)()), name
+    assert np.isclose(a.top_x_pct_share(0.2), s.top_x_pct_share(0.2))
+    assert np.allclose(a.quantile([0.1, 0.9]), s.quantile([0.1, 0.9]))
+    assert np.allclose(a.rank(pct=True), s.rank(pct=True))
+    assert np.array_equal(a.decile_rank(), s.decile_rank())
+    assert np.allclose(a.cumsum(), s.cumsum())
+
+
+def test_arithmetic():
+    a = mdf.MicroArray(np.array([1.0, 2.0, 3.0]), weights=[1, 2, 3])
+    b = (a - 1) * 2
+    assert b.weights is a.weights
+    assert b.values.tolist() == [0, 2, 4]
+    assert (1 - a).values.tolist() == [0, -1, -2]
+    assert (np.ones(3) + a).values.tolist() == [2, 3, 4]
+    above = a[a > 1]
+    assert above.sum() == 13
+    s = above.to_micro_series()
+    assert isinstance(s, mdf.MicroSeries)
+    assert s.sum() == 13
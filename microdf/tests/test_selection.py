@@ -0,0 +1,43 @@
+import numpy as np
+
+from microdf.selection import select_quantiles
+
+
+def sorted_quantiles(values, weights, quantiles):
+    order = np.argsort(values, kind="stable")
+    values, weights = values[order], weights[order]
+    positions = (np.cumsum(weights) - 0.5 * weights) / np.sum(weights)
+    return np.interp(quantiles, positions, values)
+
+
+def test_select_quantiles_matches_sort():
+    rng = np.random.default_rng(0)
+    n = 50_000
+    quantiles = [0, 0.1, 0.5, 1]
+    for values in [
+        rng.lognormal(size=n),
+        # Many tied values.
+        rng.integers(0, 5, n),
+        np.where(rng.uniform(size=n) < 0.4, 0, rng.integers(1, 1000, n)),
+    ]:
+        # Integer weights sum exactly, so results are identical.
+        weights = rng.integers(0, 10, n).astype(float)
+        assert np.array_equal(
+            select_quantiles(values, weights, quantiles),
+            sorted_quantiles(values, weights, quantiles),
+        )
+        weights = rng.uniform(0, 10, n)
+        assert np.allclose(
+            select_quantiles(values, weights, quantiles),
+            sorted_quantiles(values, weights, quantiles),
+        )
+
+
+def test_select_quantiles_missing_values():
+    values = np.arange(5000, dtype=float)
+    values[::7] = np.nan
+    weights = np.ones(5000)
+    assert np.array_equal(
+        select_quantiles(values, weights, 0.5),
+        sorted_quantiles(values, weights, 0.5),
+    )
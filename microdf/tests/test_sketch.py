@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import microdf as mdf
+
+Q = [0.01, 0.1, 0.5, 0.9, 0.99]
+
+
+def test_sketch_exact_when_small():
+    rng = np.random.default_rng(0)
+    s = mdf.MicroSeries(
+        rng.lognormal(size=500), weights=rng.integers(1, 10, 500)
+    )
+    assert np.array_equal(s.sketch().quantile(Q), s.quantile(Q))
+
+
+def test_sketch_merge():
+    rng = np.random.default_rng(1)
+    s = mdf.MicroSeries(
+        rng.lognormal(10, 1, 100_000), weights=rng.uniform(1, 100, 100_000)
+    )
+    parts = [s[i:i + 7_000].sketch() for i in range(0, len(s), 7_000)]
+    sketch = parts[0]
+    for part in parts[1:]:
+        sketch.merge(part)
+    assert len(sketch.means) <= 1000
+    assert np.isclose(sketch.total_weight, s.weights.sum())
+    # Rank error well within the documented bound.
+    ranks = s.ecdf().cdf(sketch.quantile(Q))
+    assert np.allclose(ranks, Q, atol=0.002)
+
+
+def test_chunked_micro_series():
+    rng = np.random.default_rng(2)
+    s = mdf.MicroSeries(
+        rng.lognormal(10, 1, 50_000), weights=rng.uniform(1, 100, 50_000)
+    )
+    chunked = mdf.ChunkedMicroSeries(
+        lambda: (s[i:i + 5_000] for i in range(0, len(s), 5_000))
+    )
+    assert np.isclose(s.ecdf().cdf(chunked.median()), 0.5, atol=0.002)
+    assert np.allclose(
+        s.ecdf().cdf(chunked.deciles()), np.arange(1, 10) / 10, atol=0.002
+    )
+
+
+def test_exact_quantiles():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "x": np.where(rng.uniform(size=n) < 0.3, 0, rng.lognormal(size=n)),
+            "w": rng.integers(1, 10, n),
+        }
+    )
+    chunked = mdf.ChunkedMicroSeries.from_frames(
+        lambda: (df[i:i + 1_500] for i in range(0, n, 1_500)), "x", "w"
+    )
+    expected = mdf.weighted_quantile(df, "x", "w", Q)
+    # Few bins and records force several refinement passes.
+    assert np.array_equal(
+        chunked.exact_quantiles(Q, n_bins=8, max_records=100), expected
+    )
+    assert np.array_equal(chunked.quantile(Q, exact=True), expected)
+    with pytest.raises(ValueError):
+        mdf.ChunkedMicroSeries(iter([])).exact_quantiles(0.5)
@@ -0,0 +1,45 @@
+import numpy as np
+
+import microdf as mdf
+
+
+def test_weighted_summary_merge():
+    rng = np.random.default_rng(0)
+    # A large offset tests the stability of the variance.
+    values = 1e9 + rng.normal(size=10_000)
+    weights = rng.uniform(1, 5, 10_000)
+    s = mdf.MicroSeries(values, weights=weights)
+    bins = 1e9 + np.linspace(-3, 3, 7)
+    parts = [s[i:i + 999].summary(bins) for i in range(0, len(s), 999)]
+    summary = parts[0]
+    for part in parts[1:]:
+        summary.merge(part)
+    assert summary.n == len(s)
+    assert np.isclose(summary.count, s.count())
+    assert np.isclose(summary.sum, s.sum())
+    assert np.isclose(summary.mean, s.mean())
+    mean = np.average(values, weights=weights)
+    variance = np.average((values - mean) ** 2, weights=weights)
+    assert np.isclose(summary.variance, variance, rtol=1e-6)
+    assert summary.min == values.min() and summary.max == values.max()
+    assert np.allclose(
+        summary.histogram, np.histogram(values, bins, weights=weights)[0]
+    )
+    assert summary.to_series()["std"] == summary.std
+
+
+def test_weighted_summary_missing_values():
+    summary = mdf.WeightedSummary().update([1, np.nan, 3], [1, 5, 3])
+    assert summary.n == 2
+    assert summary.count == 4
+    assert summary.mean == 2.5
+    empty = mdf.WeightedSummary().to_series()
+    assert empty["n"] == 0 and np.isnan(empty["mean"])
+
+
+def test_chunked_summary():
+    s = mdf.MicroSeries([1, 2, 3, 4], weights=[4, 3, 2, 1])
+    chunked = mdf.ChunkedMicroSeries([s[:2], s[2:]])
+    assert chunked.sum() == s.sum()
+    assert chunked.count() == s.count()
+    assert chunked.mean() == s.mean()
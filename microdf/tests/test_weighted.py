@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -73,3 +74,20 @@ def test_gini():
 def test_add_weighted_quantiles():
     with pytest.deprecated_call():
         mdf.add_weighted_quantiles(df, "x", "w")
+
+
+def test_grouped_weighted_median_matches_per_group():
+    rng = np.random.default_rng(0)
+    n = 500
+    d = pd.DataFrame(
+        {
+            # Rounded so that groups contain tied values.
+            "x": rng.normal(size=n).round(1),
+            "w": rng.choice([0, 1, 2.5, 10], size=n),
+            "g": rng.choice(list("abcdefg"), size=n),
+        }
+    )
+    medians = mdf.weighted_median(d, "x", "w", "g")
+    for group, group_df in d.groupby("g"):
+        expected = mdf.weighted_quantile(group_df, "x", "w", 0.5)
+        assert np.isclose(medians[group], expected)
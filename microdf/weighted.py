@@ -3,6 +3,8 @@ import pandas as pd
 import warnings
 
 import microdf as mdf
+from microdf.group_index import GroupIndex, as_group_index
+from microdf.selection import select_quantiles
 
 
 def weight(df, col, w=None):
@@ -27,7 +29,7 @@ def weighted_sum(df, col, w=None, groupby=None):
     :param col: A string indicating the column in the DataFrame.
         Can also be a list of column strings.
     :param w: Weight column.
-    :param groupby: Groupby column.
+    :param groupby: Groupby column, or a GroupIndex of df.
     :returns: The weighted sum of a DataFrame's column.
 
     """
@@ -41,9 +43,39 @@ def weighted_sum(df, col, w=None, groupby=None):
             return df[col].sum()
         return _weighted_sum(df, col, w)
     # If grouping.
-    if w is None:
+    if w is None and not isinstance(groupby, GroupIndex):
         return df.groupby(groupby)[col].sum()
-    return df.groupby(groupby).apply(lambda x: _weighted_sum(x, col, w))
+    group_index = as_group_index(df, groupby)
+    return _grouped_sum(df[col], _weight_array(df, w), group_index)
+
+
+def _weight_array(df, w):
+    """Returns weight column w as a float array, or 1 if w is None."""
+    if w is None:
+        return 1
+    return np.array(df[w], dtype=float)
+
+
+def _grouped_sum(values, weights, group_index):
+    """Calculates weighted sums within each group.
+
+    :param values: Series, or DataFrame for sums of each column.
+    :param weights: Array of weights, or a scalar.
+    :param group_index: GroupIndex of values' rows.
+    :returns: Series, or DataFrame, of weighted sums indexed by group.
+
+    """
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(
+            {
+                col: _grouped_sum(values[col], weights, group_index)
+                for col in values.columns
+            }
+        )
+    weighted = np.array(values, dtype=float) * weights
+    # Missing values count as zero, as in the ungrouped sum.
+    weighted[np.isnan(weighted)] = 0
+    return pd.Series(group_index.sum(weighted), index=group_index.groups)
 
 
 def weighted_mean(df, col, w=None, groupby=None):
@@ -53,7 +85,7 @@ def weighted_mean(df, col, w=None, groupby=None):
     :param col: A string indicating the column in the DataFrame.
         Can also be a list of column strings.
     :param w: Weight column.
-    :param groupby: Groupby column.
+    :param groupby: Groupby column, or a GroupIndex of df.
     :returns: The weighted mean of a DataFrame's column.
 
     """
@@ -67,9 +99,16 @@ def weighted_mean(df, col, w=None, groupby=None):
             return df[col].mean()
         return _weighted_mean(df, col, w)
     # Group.
-    if w is None:
+    if w is None and not isinstance(groupby, GroupIndex):
         return df.groupby(groupby)[col].mean()
-    return df.groupby(groupby).apply(lambda x: _weighted_mean(x, col, w))
+    group_index = as_group_index(df, groupby)
+    weights = _weight_array(df, w)
+    sums = _grouped_sum(df[col], weights, group_index)
+    if w is None:
+        # Unweighted means skip missing values.
+        return sums / _grouped_sum(df[col].notna(), 1, group_index)
+    totals = pd.Series(group_index.sum(weights), index=group_index.groups)
+    return sums.div(totals, axis=0)
 
 
 def weighted_quantile(df: pd.DataFrame, col: str, w: str, quantiles: np.array):
@@ -99,12 +138,7 @@ def weighted_quantile(df: pd.DataFrame, col: str, w: str, quantiles: np.array):
     assert np.all(quantiles >= 0) and np.all(
         quantiles <= 1
     ), "quantiles should be in [0, 1]"
-    sorter = np.argsort(values)
-    values = values[sorter]
-    sample_weight = sample_weight[sorter]
-    weighted_quantiles = np.cumsum(sample_weight) - 0.5 * sample_weight
-    weighted_quantiles /= np.sum(sample_weight)
-    return np.interp(quantiles, weighted_quantiles, values)
+    return select_quantiles(values, sample_weight, quantiles)
 
 
 def weighted_median(df, col, w=None, groupby=None):
@@ -113,6 +147,7 @@ def weighted_median(df, col, w=None, groupby=None):
     :param df: A pandas DataFrame containing Tax-Calculator data.
     :param col: A string indicating the column in the DataFrame.
     :param w: Weight column.
+    :param groupby: Groupby column, or a GroupIndex of df.
     :returns: The weighted median of a DataFrame's column.
 
     """
@@ -126,9 +161,13 @@ def weighted_median(df, col, w=None, groupby=None):
             return df[col].median()
         return _weighted_median(df, col, w)
     # Group.
-    if w is None:
+    if w is None and not isinstance(groupby, GroupIndex):
         return df.groupby(groupby)[col].median()
-    return df.groupby(groupby).apply(lambda x: _weighted_median(x, col, w))
+    group_index = as_group_index(df, groupby)
+    values = np.array(df[col], dtype=float)
+    weights = _weight_array(df, w) * np.ones(len(values))
+    medians = group_index.quantile(values, weights, [0.5])
+    return pd.Series(medians[:, 0], index=group_index.groups)
 
 
 def add_weighted_quantiles(df, col, w):
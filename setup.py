@@ -15,6 +15,7 @@ setup(
     ],
     extras_require={
       "taxcalc": ["taxcalc"],
+      "parquet": ["pyarrow"],
       "charts": [
         "seaborn",
         "matplotlib",